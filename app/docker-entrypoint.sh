@@ -1,33 +1,7 @@
 #!/bin/bash
 set -e
 
-function _parse_true() {
-	case "$1" in
-		
-		true | True | TRUE | 1)
-		return 0
-		;;
-		
-		*)
-		return 1
-		;;
-
-	esac
-}
-
-function _parse_false() {
-	case "$1" in
-		
-		false | False | FALSE | 0)
-		return 0
-		;;
-		
-		*)
-		return 1
-		;;
-
-	esac
-}
+source /app/functions.sh
 
 function _print_version {
     if [[ -n "${NGINX_PROXY_VERSION:-}" ]]; then
@@ -107,6 +81,69 @@ function _setup_dhparam() {
 	cp "${RFC7919_DHPARAM_FILE}" "${DHPARAM_FILE}"
 }
 
+function _setup_config_output() {
+	# Where docker-gen writes the generated configuration (see app/Procfile)
+	if _config_is_staged; then
+		local SPLIT_DIR='/etc/nginx/conf.d/nginx-proxy'
+		mkdir -p "${SPLIT_DIR}"
+		# docker-gen skips the notification when the generated file did not change,
+		# remove the one left by a previous run so the split files are installed.
+		rm -f "${SPLIT_DIR}/generated"
+		export DOCKER_GEN_DEST="${SPLIT_DIR}/generated"
+	else
+		export DOCKER_GEN_DEST='/etc/nginx/conf.d/default.conf'
+	fi
+}
+
+function _setup_worker_shutdown_timeout() {
+	# Bound the time old worker processes keep serving long lived connections
+	# after a reload (worker_shutdown_timeout is only valid in nginx main context).
+	local CONF_FILE='/etc/nginx/toplevel.conf.d/worker_shutdown_timeout.conf'
+
+	if [[ -z ${WORKER_SHUTDOWN_TIMEOUT:-} ]]; then
+		rm -f "${CONF_FILE}"
+		return 0
+	elif [[ ! ${WORKER_SHUTDOWN_TIMEOUT} =~ ^[0-9]+(ms|s|m|h|d)?$ ]]; then
+		echo "ERROR: Unsupported WORKER_SHUTDOWN_TIMEOUT value: ${WORKER_SHUTDOWN_TIMEOUT}. Use an nginx time value such as 30s or 5m." >&2
+		exit 1
+	fi
+
+	mkdir -p "${CONF_FILE%/*}"
+	echo "worker_shutdown_timeout ${WORKER_SHUTDOWN_TIMEOUT};" > "${CONF_FILE}"
+}
+
+function _setup_worker_processes() {
+	# Export the number of nginx worker processes for the template, which
+	# shares the upstream keepalive pools between them.
+	if [[ -n ${NGINX_WORKER_PROCESSES:-} ]]; then
+		return 0
+	fi
+
+	local WORKER_PROCESSES
+	WORKER_PROCESSES="$(sed -n 's/^[[:space:]]*worker_processes[[:space:]]\+\([^;[:space:]]*\).*/\1/p' /etc/nginx/nginx.conf 2>/dev/null | head -n 1)"
+	if [[ -z $WORKER_PROCESSES ]]; then
+		WORKER_PROCESSES=1
+	elif [[ $WORKER_PROCESSES == 'auto' ]]; then
+		WORKER_PROCESSES="$(nproc)"
+	fi
+	export NGINX_WORKER_PROCESSES="$WORKER_PROCESSES"
+}
+
+function _setup_session_tickets() {
+	# Create the shared TLS session ticket keys and their nginx configuration,
+	# rotated by /app/session-ticket-keys.sh afterwards.
+	if ! /app/session-ticket-keys.sh --setup; then
+		echo "ERROR: Unable to set up the TLS session ticket keys in ${SSL_SESSION_TICKET_KEYS_DIR:-/etc/nginx/session-tickets}." >&2
+		exit 1
+	fi
+}
+
+function _setup_ocsp_stapling() {
+	# Fetch the missing OCSP responses before the first configuration is
+	# generated, refreshed by /app/ocsp-stapling.sh afterwards.
+	/app/ocsp-stapling.sh --setup || echo 'Warning: failed to prefetch the OCSP responses.' >&2
+}
+
 # Run the init logic if the default CMD was provided
 if [[ $* == 'forego start -r' ]] || [[ $* =~ 'docker-gen -watch' ]]; then
 	_print_version
@@ -117,6 +154,34 @@ if [[ $* == 'forego start -r' ]] || [[ $* =~ 'docker-gen -watch' ]]; then
 
 	_setup_dhparam
 
+	if [[ $* == 'forego start -r' ]]; then
+		_setup_config_output
+
+		_setup_worker_shutdown_timeout
+
+		_setup_worker_processes
+
+		_setup_session_tickets
+
+		_setup_ocsp_stapling
+	else
+		if _parse_true "${SSL_SESSION_TICKETS:-false}"; then
+			echo 'Warning: SSL_SESSION_TICKETS is only supported by the nginxproxy/nginx-proxy image, session tickets will stay disabled.' >&2
+		fi
+		if _parse_true "${OCSP_STAPLING_PREFETCH:-false}"; then
+			echo 'Warning: OCSP_STAPLING_PREFETCH is only supported by the nginxproxy/nginx-proxy image, nginx will fetch the OCSP responses itself.' >&2
+		fi
+		if [[ -n ${WORKER_SHUTDOWN_TIMEOUT:-} ]]; then
+			echo 'Warning: WORKER_SHUTDOWN_TIMEOUT is only supported by the nginxproxy/nginx-proxy image, set worker_shutdown_timeout in the nginx container configuration instead.' >&2
+		fi
+		if _parse_true "${SPLIT_CONFIG:-false}"; then
+			echo 'Warning: SPLIT_CONFIG is only supported by the nginxproxy/nginx-proxy image, the configuration will be generated as a single file.' >&2
+		fi
+		if _parse_true "${COMPACT_CONFIG:-false}"; then
+			echo 'Warning: COMPACT_CONFIG is only supported by the nginxproxy/nginx-proxy image, the diagnostic comments will be kept in the configuration.' >&2
+		fi
+	fi
+
 	if [ -z "${TRUST_DOWNSTREAM_PROXY}" ]; then
 		cat >&2 <<-EOT
 			Warning: TRUST_DOWNSTREAM_PROXY is not set; defaulting to "true". For security, you should explicitly set TRUST_DOWNSTREAM_PROXY to "false" if there is not a trusted reverse proxy in front of this proxy.
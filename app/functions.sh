@@ -0,0 +1,114 @@
+#!/bin/bash
+# Helper functions shared by the nginx-proxy scripts.
+
+function _parse_true() {
+	case "$1" in
+		
+		true | True | TRUE | 1)
+		return 0
+		;;
+		
+		*)
+		return 1
+		;;
+
+	esac
+}
+
+function _parse_false() {
+	case "$1" in
+		
+		false | False | FALSE | 0)
+		return 0
+		;;
+		
+		*)
+		return 1
+		;;
+
+	esac
+}
+
+function _config_is_staged() {
+	# Whether docker-gen output goes through /app/update-config.sh before being installed
+	_parse_true "${SPLIT_CONFIG:-false}" || _parse_true "${COMPACT_CONFIG:-false}"
+}
+
+function _now_us() {
+	# Current time in microseconds
+	echo "${EPOCHREALTIME//[!0-9]/}"
+}
+
+function _docker_gen_cpu_us() {
+	# CPU time (user and system) used so far by the docker-gen process this
+	# script was started by, in microseconds
+	local pid=$PPID stat fields
+	while (( pid > 1 )); do
+		stat="$(< "/proc/${pid}/stat")" || return 1
+		# The process name is between parentheses and may contain spaces
+		read -r -a fields <<< "${stat##*) }"
+		if [[ $(< "/proc/${pid}/comm") == 'docker-gen' ]]; then
+			# utime and stime, in clock ticks of 1/100 s
+			echo $(( (fields[11] + fields[12]) * 10000 ))
+			return 0
+		fi
+		pid=${fields[1]}
+	done
+	return 1
+}
+
+function _duration_to_us() {
+	# Convert a duration such as 500ms, 2s or 1.5 (seconds) to microseconds
+	if [[ ! $1 =~ ^([0-9]+)(\.([0-9]{1,6}))?(ms|s)?$ ]]; then
+		return 1
+	fi
+	local fraction
+	fraction=$(printf '%-6s' "${BASH_REMATCH[3]}")
+	local us=$(( 10#${BASH_REMATCH[1]} * 1000000 + 10#${fraction// /0} ))
+	if [[ ${BASH_REMATCH[4]} == 'ms' ]]; then
+		us=$(( us / 1000 ))
+	fi
+	echo "$us"
+}
+
+function _interval_to_seconds() {
+	# Convert an interval such as 90, 30s, 15m, 12h or 1d to seconds
+	if [[ ! $1 =~ ^([0-9]+)(s|m|h|d)?$ ]]; then
+		return 1
+	fi
+	case "${BASH_REMATCH[2]}" in
+		m) echo $(( 10#${BASH_REMATCH[1]} * 60 )) ;;
+		h) echo $(( 10#${BASH_REMATCH[1]} * 3600 )) ;;
+		d) echo $(( 10#${BASH_REMATCH[1]} * 86400 )) ;;
+		*) echo $(( 10#${BASH_REMATCH[1]} )) ;;
+	esac
+}
+
+function _nginx_master_pid() {
+	# PID of the running nginx master process
+	local pid_file pid
+	for pid_file in /run/nginx.pid /var/run/nginx.pid; do
+		if [[ -s $pid_file ]]; then
+			read -r pid < "$pid_file"
+			if [[ -n $pid ]] && kill -0 "$pid" 2>/dev/null; then
+				echo "$pid"
+				return 0
+			fi
+		fi
+	done
+	return 1
+}
+
+function _request_reload() {
+	# Hand a reload request over to the reload coordinator
+	# (/app/reload-coordinator.sh) when it's running, so that it can batch the
+	# reloads, or reload nginx directly.
+	# $1: render duration of the new configuration in microseconds, or "-"
+	local run_dir='/var/run/nginx-proxy'
+	if [[ -p ${run_dir}/reload.fifo && -s ${run_dir}/reload-coordinator.pid ]] \
+		&& kill -0 "$(< "${run_dir}/reload-coordinator.pid")" 2>/dev/null; then
+		echo "request ${1:--}" > "${run_dir}/reload.fifo"
+	else
+		nginx -s reload
+	fi
+}
@@ -0,0 +1,30 @@
+#!/bin/bash
+# Notification command run by docker-gen once it generated a new configuration.
+set -e
+
+source /app/functions.sh
+
+# The CPU time docker-gen used since the previous notification, which is mostly
+# spent rendering the template.
+render_time='-'
+cpu_file='/var/run/nginx-proxy/docker-gen-cpu'
+if cpu_time="$(_docker_gen_cpu_us)"; then
+	mkdir -p "${cpu_file%/*}"
+	previous=0
+	if [[ -s $cpu_file ]]; then
+		previous="$(< "$cpu_file")"
+	fi
+	# docker-gen restarted if its CPU time went backwards
+	render_time=$(( cpu_time >= previous ? cpu_time - previous : cpu_time ))
+	echo "$cpu_time" > "$cpu_file"
+fi
+
+if _config_is_staged; then
+	/app/update-config.sh "${DOCKER_GEN_DEST}"
+	if ! grep -qv '^unchanged ' /etc/nginx/conf.d/nginx-proxy/manifest; then
+		echo 'Info: the generated configuration did not change, skipping nginx reload'
+		exit 0
+	fi
+fi
+
+_request_reload "$render_time"
@@ -0,0 +1,147 @@
+#!/bin/bash
+# Fetch and refresh the OCSP responses stapled by nginx, out of band.
+#
+# For every certificate with a chain (/etc/nginx/certs/<cert>.crt and
+# <cert>.chain.pem), the OCSP response is requested from the responder listed
+# in the certificate (or OCSP_STAPLING_RESPONDER), verified against the chain
+# and written to /etc/nginx/certs/<cert>.ocsp.der, which the template passes to
+# ssl_stapling_file. nginx then staples it from the first handshake on, without
+# querying the responder itself.
+#
+# The responses are refreshed every OCSP_STAPLING_REFRESH and nginx is
+# reloaded. A response that could not be refreshed before it expired is
+# removed, nginx then falls back to fetching the responses itself. docker-gen
+# regenerates the configuration when responses are added or removed.
+#
+# Run with --setup to fetch the missing responses once.
+set -e
+
+source /app/functions.sh
+
+CERTS_DIR='/etc/nginx/certs'
+POLL_INTERVAL=300
+
+if ! REFRESH=$(_interval_to_seconds "${OCSP_STAPLING_REFRESH:-12h}") || (( REFRESH == 0 )); then
+	echo "Warning: invalid OCSP_STAPLING_REFRESH value '${OCSP_STAPLING_REFRESH}', using the default value of 12h." >&2
+	REFRESH=$(( 12 * 3600 ))
+fi
+
+function _ocsp() {
+	# Run openssl ocsp for the certificate $1, with its issuer and chain,
+	# and fail unless the response is verified and the certificate is good.
+	local cert="$1" output issuer status=0
+	issuer="$(mktemp)"
+	# The issuer is the first certificate of the chain
+	sed -n '/-----BEGIN CERTIFICATE-----/,/-----END CERTIFICATE-----/{p;/-----END CERTIFICATE-----/q}' \
+		"${CERTS_DIR}/${cert}.chain.pem" > "$issuer"
+	output="$(openssl ocsp -no_nonce -issuer "$issuer" -cert "${CERTS_DIR}/${cert}.crt" \
+		-CAfile "${CERTS_DIR}/${cert}.chain.pem" "${@:2}" 2>&1)" || status=$?
+	rm -f "$issuer"
+	if (( status != 0 )) || [[ $output != *'Response verify OK'* ]] \
+		|| [[ $output == *'Status times invalid'* ]] || [[ $output != *": good"* ]]; then
+		echo "$output" | sed -e 's/^/    /' >&2
+		return 1
+	fi
+}
+
+function _fetch() {
+	# Fetch the OCSP response of the certificate $1
+	local cert="$1" url response="${CERTS_DIR}/${1}.ocsp.der"
+	url="${OCSP_STAPLING_RESPONDER:-$(openssl x509 -noout -ocsp_uri -in "${CERTS_DIR}/${cert}.crt" 2>/dev/null | head -n 1)}"
+	if [[ -z $url ]]; then
+		echo "Warning: no OCSP responder in the ${cert} certificate, set OCSP_STAPLING_RESPONDER to prefetch its OCSP response." >&2
+		return 1
+	fi
+	if ! _ocsp "$cert" -url "$url" -timeout 10 -respout "${response}.tmp"; then
+		echo "Warning: failed to fetch the OCSP response of the ${cert} certificate from ${url}." >&2
+		rm -f "${response}.tmp"
+		return 1
+	fi
+	mv -f "${response}.tmp" "$response"
+	echo "Info: fetched the OCSP response of the ${cert} certificate from ${url}"
+}
+
+function _update_responses() {
+	# Fetch the missing and due responses and remove the invalid ones. Set
+	# CHANGES to "regenerate" if responses were added or removed, "reload" if
+	# responses were only refreshed.
+	local chain cert response
+	CHANGES=''
+	for chain in "$CERTS_DIR"/*.chain.pem; do
+		[[ -f $chain ]] || continue
+		cert="${chain##*/}"
+		cert="${cert%.chain.pem}"
+		[[ -f ${CERTS_DIR}/${cert}.crt ]] || continue
+		response="${CERTS_DIR}/${cert}.ocsp.der"
+		if [[ ! -s $response ]]; then
+			if _fetch "$cert"; then
+				CHANGES='regenerate'
+			fi
+		elif [[ -n $(find "$response" -mmin +$(( REFRESH / 60 ))) ]]; then
+			if _fetch "$cert"; then
+				CHANGES="${CHANGES:-reload}"
+			elif ! _ocsp "$cert" -respin "$response"; then
+				echo "Warning: removing the expired OCSP response of the ${cert} certificate." >&2
+				rm -f "$response"
+				CHANGES='regenerate'
+			fi
+		fi
+	done
+	# Responses of the certificates that were removed
+	for response in "$CERTS_DIR"/*.ocsp.der; do
+		[[ -f $response ]] || continue
+		cert="${response%.ocsp.der}"
+		if [[ ! -f ${cert}.crt || ! -f ${cert}.chain.pem ]]; then
+			rm -f "$response"
+			CHANGES='regenerate'
+		fi
+	done
+}
+
+function _regenerate_config() {
+	# Have docker-gen render the template again (on SIGHUP), which reloads nginx
+	local comm
+	for comm in /proc/[0-9]*/comm; do
+		if [[ $(cat "$comm" 2>/dev/null) == 'docker-gen' ]]; then
+			comm="${comm%/comm}"
+			kill -HUP "${comm#/proc/}" 2>/dev/null && return 0
+		fi
+	done
+	return 1
+}
+
+if ! _parse_true "${OCSP_STAPLING_PREFETCH:-false}"; then
+	[[ ${1:-} == '--setup' ]] && exit 0
+	# Nothing to fetch, stay idle so that forego doesn't stop the other processes
+	while true; do
+		sleep 3600
+	done
+fi
+
+if [[ ! -w $CERTS_DIR ]]; then
+	echo "Warning: ${CERTS_DIR} is not writable, the OCSP responses can't be prefetched." >&2
+	[[ ${1:-} == '--setup' ]] && exit 0
+	while true; do
+		sleep 3600
+	done
+fi
+
+if [[ ${1:-} == '--setup' ]]; then
+	_update_responses
+	exit 0
+fi
+
+while true; do
+	sleep "$POLL_INTERVAL"
+	_update_responses
+	case "$CHANGES" in
+		regenerate)
+			echo 'Info: the OCSP responses changed, regenerating the nginx configuration'
+			_regenerate_config || echo 'Warning: failed to signal docker-gen to regenerate the nginx configuration.' >&2
+			;;
+		reload)
+			echo 'Info: the OCSP responses were refreshed, reloading nginx'
+			_request_reload - || echo 'Warning: failed to reload nginx with the refreshed OCSP responses.' >&2
+			;;
+	esac
+done
@@ -0,0 +1,358 @@
+#!/bin/bash
+# Coordinate the nginx reloads requested by docker-gen (see /app/nginx-reload.sh).
+#
+# Reload requests are read from a FIFO and batched: the reload happens once no
+# new request arrived for a debounce period, which grows with the number of
+# requests received in the last ten seconds (from RELOAD_DEBOUNCE for a single
+# request up to RELOAD_DEBOUNCE_MAX), but never later than RELOAD_MAX_DELAY
+# after the first request of the batch. At most RELOAD_MAX_PER_MINUTE reloads
+# happen per minute, and reloads are deferred while RELOAD_MAX_DRAINING_GENERATIONS
+# generations of old worker processes are still running. nginx is reloaded by
+# sending SIGHUP to its master process.
+#
+# Every reload is measured (render duration, configuration size, nginx -t parse
+# time, time until the new workers are up and until the old ones exited). The
+# measures are logged as JSON lines and the last ones are written to
+# /var/run/nginx-proxy/reload-status.json.
+set -e
+
+source /app/functions.sh
+
+RUN_DIR='/var/run/nginx-proxy'
+RELOAD_FIFO="${RUN_DIR}/reload.fifo"
+STATUS_FILE="${RUN_DIR}/reload-status.json"
+RATE_WINDOW_US=10000000
+MINUTE_US=60000000
+WORKERS_READY_TIMEOUT_US=30000000
+
+function _duration_setting() {
+	# Duration environment variable $1 in microseconds, or the default $2
+	local us
+	if ! us=$(_duration_to_us "${!1:-$2}"); then
+		echo "Warning: invalid $1 value '${!1}', using the default value of $2." >&2
+		us=$(_duration_to_us "$2")
+	fi
+	echo "$us"
+}
+
+DEBOUNCE_MIN_US=$(_duration_setting RELOAD_DEBOUNCE 100ms)
+DEBOUNCE_MAX_US=$(_duration_setting RELOAD_DEBOUNCE_MAX 5s)
+MAX_DELAY_US=$(_duration_setting RELOAD_MAX_DELAY 10s)
+MAX_PER_MINUTE="${RELOAD_MAX_PER_MINUTE:-30}"
+if [[ ! $MAX_PER_MINUTE =~ ^[0-9]+$ ]]; then
+	echo "Warning: invalid RELOAD_MAX_PER_MINUTE value '${MAX_PER_MINUTE}', using the default value of 30." >&2
+	MAX_PER_MINUTE=30
+fi
+MAX_DRAINING="${RELOAD_MAX_DRAINING_GENERATIONS:-0}"
+if [[ ! $MAX_DRAINING =~ ^[0-9]+$ ]]; then
+	echo "Warning: invalid RELOAD_MAX_DRAINING_GENERATIONS value '${MAX_DRAINING}', the number of draining worker generations won't be limited." >&2
+	MAX_DRAINING=0
+fi
+if (( MAX_DRAINING > 0 )) && [[ -z ${WORKER_SHUTDOWN_TIMEOUT:-} ]]; then
+	echo 'Warning: RELOAD_MAX_DRAINING_GENERATIONS is set without WORKER_SHUTDOWN_TIMEOUT, long lived connections can defer nginx reloads indefinitely.' >&2
+fi
+# nginx -t parses the whole configuration and loads every certificate again
+# before the reload does the same, so it's opt-in.
+CONFIG_TEST=false
+if _parse_true "${RELOAD_CONFIG_TEST:-false}"; then
+	CONFIG_TEST=true
+fi
+
+mkdir -p "$RUN_DIR"
+rm -f "$RELOAD_FIFO" "$STATUS_FILE"
+mkfifo "$RELOAD_FIFO"
+# Keep the FIFO open for writing too so that reads never hit end of file
+exec 3<>"$RELOAD_FIFO"
+echo "$$" > "${RUN_DIR}/reload-coordinator.pid"
+
+recent_requests=()  # timestamps of the requests received in the last RATE_WINDOW_US
+recent_reloads=()   # timestamps of the reloads done in the last minute
+pending=0           # requests absorbed by the next reload
+first_request=0
+last_request=0
+render_ms=null      # render duration of the last request of the batch
+waiting_for_nginx=false
+deferred=false      # whether the next reload waits for old worker generations to drain
+
+reload_count=0
+declare -A draining=()  # reloads whose old worker processes are still running
+last_reload='null'      # JSON measures of the last reload
+last_drain_ms=null
+
+function _record_request() {
+	# $1: render duration of the requesting configuration in microseconds, or "-"
+	local now
+	now=$(_now_us)
+	recent_requests+=("$now")
+	while (( recent_requests[0] < now - RATE_WINDOW_US )); do
+		recent_requests=("${recent_requests[@]:1}")
+	done
+	if (( pending == 0 )); then
+		first_request=$now
+		render_ms=null
+	fi
+	last_request=$now
+	pending=$(( pending + 1 ))
+	if [[ ${1:-} =~ ^[0-9]+$ ]]; then
+		render_ms=$(( $1 / 1000 ))
+	fi
+}
+
+function _handle_message() {
+	# Messages are either reload requests ("request <render duration>") or
+	# reports of the drain trackers ("drained <reload id> <duration in ms>").
+	local type arg1 arg2
+	read -r type arg1 arg2 <<< "$1"
+	if [[ $type == 'drained' ]]; then
+		unset "draining[$arg1]"
+		echo "{\"event\":\"drained\",\"reload\":${arg1},\"drain_ms\":${arg2},\"draining_generations\":${#draining[@]}}"
+		if (( arg1 == reload_count )); then
+			last_drain_ms=$arg2
+		fi
+		_write_status
+	else
+		_record_request "$arg1"
+	fi
+}
+
+function _reload_deadline() {
+	# Time (in microseconds) at which the pending requests should be applied
+	local debounce=$(( DEBOUNCE_MIN_US * ${#recent_requests[@]} ))
+	if (( debounce > DEBOUNCE_MAX_US )); then
+		debounce=$DEBOUNCE_MAX_US
+	fi
+	local deadline=$(( last_request + debounce ))
+	if (( deadline > first_request + MAX_DELAY_US )); then
+		deadline=$(( first_request + MAX_DELAY_US ))
+	fi
+	if (( MAX_PER_MINUTE > 0 && ${#recent_reloads[@]} >= MAX_PER_MINUTE )); then
+		local allowed=$(( recent_reloads[${#recent_reloads[@]} - MAX_PER_MINUTE] + MINUTE_US ))
+		if (( allowed > deadline )); then
+			deadline=$allowed
+		fi
+	fi
+	echo "$deadline"
+}
+
+function _nginx_workers() {
+	# PIDs of the worker processes of the nginx master process $1 that are
+	# either "active" or "shutting" down ($2)
+	local stat pid ppid title
+	for stat in /proc/[0-9]*/stat; do
+		{ read -r pid _ _ ppid _ < "$stat"; } 2>/dev/null || continue
+		if [[ $ppid != "$1" ]]; then
+			continue
+		fi
+		title=''
+		{ IFS= read -r -d '' title < "/proc/${pid}/cmdline"; } 2>/dev/null || true
+		if [[ $title == *'worker process is shutting down'* ]]; then
+			if [[ $2 == 'shutting' ]]; then
+				echo "$pid"
+			fi
+		elif [[ $title == *'worker process'* ]]; then
+			if [[ $2 == 'active' ]]; then
+				echo "$pid"
+			fi
+		fi
+	done
+}
+
+function _nginx_children() {
+	# PIDs of the child processes of the nginx master process $1
+	local stat pid ppid
+	for stat in /proc/[0-9]*/stat; do
+		{ read -r pid _ _ ppid _ < "$stat"; } 2>/dev/null || continue
+		if [[ $ppid == "$1" ]]; then
+			echo "$pid"
+		fi
+	done
+}
+
+function _sleeping_switches() {
+	# Voluntary context switches of process $1, failing unless it's sleeping
+	local key value state='' switches=0
+	[[ -r /proc/$1/status ]] || return 1
+	while read -r key value _; do
+		case $key in
+			State:) state=$value ;;
+			voluntary_ctxt_switches:) switches=$value ;;
+		esac
+	done < "/proc/$1/status"
+	echo "$switches"
+	[[ $state == 'S' ]]
+}
+
+function _config_size() {
+	# Size in bytes of the nginx configuration files
+	{ cat /etc/nginx/nginx.conf; find /etc/nginx/conf.d /etc/nginx/toplevel.conf.d -type f -name '*.conf' -exec cat {} +; } 2>/dev/null | wc -c
+}
+
+function _track_drain() {
+	# Report through the FIFO when the old worker processes ($3...) of reload
+	# $1 (signaled at $2) have all exited
+	local id="$1" signaled="$2" pid alive
+	shift 2
+	while true; do
+		alive=false
+		for pid in "$@"; do
+			if [[ -d /proc/${pid} ]]; then
+				alive=true
+				break
+			fi
+		done
+		if [[ $alive == false ]]; then
+			echo "drained ${id} $(( ($(_now_us) - signaled) / 1000 ))" >&3
+			return 0
+		fi
+		# Poll less often once the workers have been shutting down for a while
+		if (( $(_now_us) - signaled < 10000000 )); then
+			sleep 0.1
+		else
+			sleep 1
+		fi
+	done
+}
+
+function _write_status() {
+	printf '{"reloads":%d,"draining_generations":%d,"last_reload":%s,"last_reload_drain_ms":%s}\n' \
+		"$reload_count" "${#draining[@]}" "$last_reload" "$last_drain_ms" > "${STATUS_FILE}.tmp"
+	mv -f "${STATUS_FILE}.tmp" "$STATUS_FILE"
+}
+
+function _reload() {
+	local now pid
+	now=$(_now_us)
+	if ! pid=$(_nginx_master_pid); then
+		if [[ $waiting_for_nginx == false ]]; then
+			echo 'Info: waiting for the nginx master process to reload nginx'
+			waiting_for_nginx=true
+		fi
+		return 1
+	fi
+	waiting_for_nginx=false
+
+	local parse_ms=null output start
+	if [[ $CONFIG_TEST == true ]]; then
+		start=$(_now_us)
+		if ! output=$(nginx -t -q 2>&1); then
+			echo "Error: the nginx configuration test failed, skipping the reload of ${pending} request(s):" >&2
+			echo "$output" >&2
+			pending=0
+			return 0
+		fi
+		parse_ms=$(( ($(_now_us) - start) / 1000 ))
+	fi
+
+	local old_workers old_children switches signaled
+	mapfile -t old_workers < <(_nginx_workers "$pid" active)
+	mapfile -t old_children < <(_nginx_children "$pid")
+	switches=$(_sleeping_switches "$pid") || true
+	signaled=$(_now_us)
+	if ! kill -HUP "$pid"; then
+		echo "Error: failed to signal the nginx master process ${pid}, skipping the reload of ${pending} request(s)." >&2
+		pending=0
+		return 0
+	fi
+
+	# The new workers are ready once as many active workers as before the
+	# reload are running, none of them being an old one. The reload failed if
+	# the master process handled the signal and went back to sleep without
+	# starting any process, which is checked twice in a row as it also sleeps
+	# while resolving the host names of the configuration.
+	local ready_ms=null worker new_workers child current delay=10000 idle_polls=0
+	local expected=$(( ${#old_workers[@]} > 0 ? ${#old_workers[@]} : 1 ))
+	while (( $(_now_us) - signaled < WORKERS_READY_TIMEOUT_US )); do
+		new_workers=0
+		for worker in $(_nginx_workers "$pid" active); do
+			if [[ " ${old_workers[*]} " != *" ${worker} "* ]]; then
+				new_workers=$(( new_workers + 1 ))
+			fi
+		done
+		if (( new_workers >= expected )); then
+			ready_ms=$(( ($(_now_us) - signaled) / 1000 ))
+			break
+		fi
+		if (( new_workers == 0 )) && current=$(_sleeping_switches "$pid") && (( current > switches )); then
+			for child in $(_nginx_children "$pid"); do
+				if [[ " ${old_children[*]} " != *" ${child} "* ]]; then
+					current=''
+					break
+				fi
+			done
+		else
+			current=''
+		fi
+		if [[ -n $current ]]; then
+			idle_polls=$(( idle_polls + 1 ))
+			if (( idle_polls >= 2 )); then
+				break
+			fi
+		else
+			idle_polls=0
+		fi
+		# Poll every 10ms at first, then less and less often up to every 250ms
+		sleep "$(printf '0.%06d' "$delay")"
+		delay=$(( delay * 2 > 250000 ? 250000 : delay * 2 ))
+	done
+
+	reload_count=$(( reload_count + 1 ))
+	echo "Info: reloaded nginx (master process ${pid}), absorbed ${pending} request(s) over $(( (now - first_request) / 1000 ))ms"
+	last_reload="$(printf '{"id":%d,"time":"%(%Y-%m-%dT%H:%M:%S%z)T","requests":%d,"render_ms":%s,"config_bytes":%d,"parse_ms":%s,"workers_ready_ms":%s,"old_workers":%d}' \
+		"$reload_count" -1 "$pending" "$render_ms" "$(_config_size)" "$parse_ms" "$ready_ms" "${#old_workers[@]}")"
+	last_drain_ms=null
+	if [[ $ready_ms == null ]]; then
+		# The old worker processes are still the live ones, they won't drain
+		echo "Error: no new nginx worker processes started after the reload signal, the reload of ${pending} request(s) failed (see the nginx error log)." >&2
+	elif (( ${#old_workers[@]} > 0 )); then
+		draining[$reload_count]=1
+		_track_drain "$reload_count" "$signaled" "${old_workers[@]}" &
+	fi
+	echo "{\"event\":\"reload\",${last_reload:1:-1},\"draining_generations\":${#draining[@]}}"
+	_write_status
+
+	recent_reloads+=("$now")
+	while (( ${#recent_reloads[@]} > 0 && recent_reloads[0] < now - MINUTE_US )); do
+		recent_reloads=("${recent_reloads[@]:1}")
+	done
+	pending=0
+}
+
+_write_status
+
+while true; do
+	if (( pending == 0 )); then
+		# Wait for the next message
+		if read -r -u 3 message; then
+			_handle_message "$message"
+		fi
+		continue
+	fi
+
+	timeout=$(( $(_reload_deadline) - $(_now_us) ))
+	if (( timeout > 0 )); then
+		if (( timeout < 1000 )); then
+			timeout=1000
+		fi
+		if read -r -t "$(printf '%d.%06d' $(( timeout / 1000000 )) $(( timeout % 1000000 )))" -u 3 message; then
+			_handle_message "$message"
+		fi
+		continue
+	fi
+
+	if (( MAX_DRAINING > 0 && ${#draining[@]} >= MAX_DRAINING )); then
+		# Wait for a generation of old worker processes to exit (or for more requests)
+		if [[ $deferred == false ]]; then
+			echo "Info: deferring the nginx reload, ${#draining[@]} generation(s) of old worker processes are still draining"
+			deferred=true
+		fi
+		if read -r -u 3 message; then
+			_handle_message "$message"
+		fi
+		continue
+	fi
+	deferred=false
+
+	if ! _reload; then
+		sleep 1
+	fi
+done
@@ -0,0 +1,113 @@
+#!/bin/bash
+# Rotate the TLS session ticket keys shared by several nginx-proxy instances.
+#
+# The keys are files of 80 random bytes in SSL_SESSION_TICKET_KEYS_DIR, a volume
+# shared by the instances, named after their creation time. Any instance creates
+# a new key once the newest one is older than SSL_SESSION_TICKET_KEY_ROTATION (a
+# lock file on the volume ensures that a single key is created), and every
+# instance polls the directory and reloads nginx when the keys changed.
+#
+# The keys are listed in /etc/nginx/session-tickets.conf, included by the server
+# blocks: the first key encrypts the new tickets, the other ones only decrypt
+# the tickets issued before the last rotations. A new key only becomes the
+# first one after a grace period, once every instance can decrypt the tickets
+# it encrypts.
+#
+# Run with --setup to create the first key and the nginx configuration once.
+set -e
+
+source /app/functions.sh
+
+KEYS_DIR="${SSL_SESSION_TICKET_KEYS_DIR:-/etc/nginx/session-tickets}"
+CONF_FILE='/etc/nginx/session-tickets.conf'
+LOCK_FILE="${KEYS_DIR}/.lock"
+POLL_INTERVAL=60
+GRACE_PERIOD=$(( POLL_INTERVAL * 2 ))
+KEYS_IN_USE=3
+
+if ! ROTATION=$(_interval_to_seconds "${SSL_SESSION_TICKET_KEY_ROTATION:-12h}") || (( ROTATION == 0 )); then
+	echo "Warning: invalid SSL_SESSION_TICKET_KEY_ROTATION value '${SSL_SESSION_TICKET_KEY_ROTATION}', using the default value of 12h." >&2
+	ROTATION=$(( 12 * 3600 ))
+fi
+
+function _keys() {
+	# Key files, newest first
+	find "$KEYS_DIR" -maxdepth 1 -type f -name '[0-9]*.key' 2>/dev/null | sort -r
+}
+
+function _key_age() {
+	# Age in seconds of the key file $1, from its name
+	local name="${1##*/}"
+	echo $(( $(date +%s) - 10#${name%.key} ))
+}
+
+function _rotate_keys() {
+	# Create a new key if the newest one is due for rotation, and remove the
+	# keys no instance uses anymore (one more than the keys in use is kept, as
+	# the other instances may not have reloaded yet).
+	(
+		flock 9
+		local newest key
+		newest="$(_keys | head -n 1)"
+		if [[ -z $newest ]] || (( $(_key_age "$newest") >= ROTATION )); then
+			key="${KEYS_DIR}/$(date +%s).key"
+			head -c 80 /dev/urandom > "${key}.tmp"
+			chmod 600 "${key}.tmp"
+			mv -f "${key}.tmp" "$key"
+			echo "Info: created the TLS session ticket key ${key}"
+		fi
+		_keys | tail -n +$(( KEYS_IN_USE + 2 )) | xargs -r rm -f
+	) 9>"$LOCK_FILE"
+}
+
+function _write_conf() {
+	# Write the nginx configuration of the current keys, return 1 if it didn't change
+	local keys
+	mapfile -t keys < <(_keys)
+	if (( ${#keys[@]} == 0 )); then
+		echo "Error: no TLS session ticket key in ${KEYS_DIR}." >&2
+		return 1
+	fi
+	if (( ${#keys[@]} > 1 )) && (( $(_key_age "${keys[0]}") < GRACE_PERIOD )); then
+		# Only decrypt with the new key until every instance loaded it
+		keys=("${keys[1]}" "${keys[0]}" "${keys[@]:2}")
+	fi
+
+	{
+		echo '# TLS session ticket keys managed by /app/session-ticket-keys.sh, the first one encrypts the new tickets.'
+		echo 'ssl_session_tickets on;'
+		printf 'ssl_session_ticket_key %s;\n' "${keys[@]:0:KEYS_IN_USE}"
+	} > "${CONF_FILE}.tmp"
+	if cmp -s "${CONF_FILE}.tmp" "$CONF_FILE"; then
+		rm -f "${CONF_FILE}.tmp"
+		return 1
+	fi
+	mv -f "${CONF_FILE}.tmp" "$CONF_FILE"
+}
+
+if ! _parse_true "${SSL_SESSION_TICKETS:-false}"; then
+	if [[ ${1:-} == '--setup' ]]; then
+		rm -f "$CONF_FILE"
+		exit 0
+	fi
+	# Nothing to rotate, stay idle so that forego doesn't stop the other processes
+	while true; do
+		sleep 3600
+	done
+fi
+
+mkdir -p "$KEYS_DIR"
+_rotate_keys
+if [[ ${1:-} == '--setup' ]]; then
+	_write_conf || [[ -s $CONF_FILE ]]
+	exit
+fi
+
+while true; do
+	sleep "$POLL_INTERVAL"
+	_rotate_keys || echo "Warning: failed to rotate the TLS session ticket keys in ${KEYS_DIR}." >&2
+	if _write_conf; then
+		echo 'Info: the TLS session ticket keys changed, reloading nginx'
+		_request_reload - || echo 'Warning: failed to reload nginx with the new TLS session ticket keys.' >&2
+	fi
+done
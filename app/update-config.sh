@@ -0,0 +1,171 @@
+#!/bin/bash
+# Install the configuration generated by docker-gen when SPLIT_CONFIG or
+# COMPACT_CONFIG is enabled.
+#
+# With SPLIT_CONFIG, the template marks the start of each section of the
+# generated configuration with a "#@file <name>" line. Every section is written
+# to its own file in /etc/nginx/conf.d/nginx-proxy and
+# /etc/nginx/conf.d/default.conf includes them in order.
+#
+# With COMPACT_CONFIG, the diagnostic comments prefixed with "#@report " are
+# moved to the /etc/nginx/conf.d/nginx-proxy/report file and blank lines are
+# dropped.
+#
+# Only the files whose content changed are rewritten, files that are no longer
+# generated are removed and the manifest lists the status of every file (added,
+# changed, removed or unchanged).
+#
+# Usage: update-config.sh <generated file>
+set -eu
+
+GENERATED="${1:-${DOCKER_GEN_DEST:-/etc/nginx/conf.d/nginx-proxy/generated}}"
+CONF_DIR='/etc/nginx/conf.d'
+SPLIT_DIR="${CONF_DIR}/nginx-proxy"
+MANIFEST="${SPLIT_DIR}/manifest"
+STAGING="${CONF_DIR}/.nginx-proxy.staging"
+
+source /app/functions.sh
+
+COMPACT=0
+if _parse_true "${COMPACT_CONFIG:-false}"; then
+	COMPACT=1
+fi
+
+# The new files are staged in $STAGING, a mirror of $CONF_DIR on the same file
+# system, then moved in place all at once.
+rm -rf "$STAGING"
+mkdir -p "${SPLIT_DIR}/upstreams" "${SPLIT_DIR}/vhosts" \
+	"${STAGING}/nginx-proxy/upstreams" "${STAGING}/nginx-proxy/vhosts"
+
+# The split files currently installed, relative to $SPLIT_DIR
+(cd "$SPLIT_DIR" && find . -type f -name '*.conf' | sed 's|^\./||') > "${STAGING}/installed"
+
+awk \
+	-v conf_dir="$CONF_DIR" \
+	-v staging="$STAGING" \
+	-v compact="$COMPACT" \
+	'
+	function glob_escape(s,   out, c, i) {
+		out = ""
+		for (i = 1; i <= length(s); i++) {
+			c = substr(s, i, 1)
+			if (c == "*" || c == "?" || c == "[" || c == "\\") out = out "\\"
+			out = out c
+		}
+		return out
+	}
+
+	# Keep the generated files inside their directory whatever the vhost name.
+	function sanitize(s,   i, dir, base) {
+		i = index(s, "/")
+		dir = i ? substr(s, 1, i) : ""
+		base = i ? substr(s, i + 1) : s
+		gsub(/\//, "_", base)
+		if (base ~ /^\.*$/) base = "_" base
+		return dir base
+	}
+
+	# Stream the file at path (relative to conf_dir) to the staging directory
+	# while comparing it line by line with the installed one, so that the files
+	# are written in a single linear pass.
+	function stream_open(path,   line, r) {
+		r = (getline line < (conf_dir "/" path))
+		existed[path] = r >= 0
+		pending[path] = line
+		has_pending[path] = r > 0
+		differs[path] = 0
+		printf "" > (staging "/" path)
+	}
+
+	function stream_write(path, text,   line) {
+		print text > (staging "/" path)
+		if (differs[path]) return
+		if (!has_pending[path] || pending[path] != text) {
+			differs[path] = 1
+			return
+		}
+		has_pending[path] = (getline line < (conf_dir "/" path)) > 0
+		pending[path] = line
+	}
+
+	# Close the stream, queue the staged file to be moved in place unless the
+	# installed one is identical, then print the status of the file.
+	function stream_close(path, label,   status) {
+		close(staging "/" path)
+		status = "added"
+		if (existed[path]) {
+			close(conf_dir "/" path)
+			status = differs[path] || has_pending[path] ? "changed" : "unchanged"
+		}
+		if (status != "unchanged") stage(path)
+		print status, label
+	}
+
+	# Add path to the list of the staged files to move in its directory.
+	function stage(path,   i) {
+		i = match(path, /\/[^\/]*$/)
+		if (i) print substr(path, i + 1) > (staging "/" substr(path, 1, i - 1) "/.moved")
+		else print path > (staging "/.moved")
+	}
+
+	function flush() {
+		if (name == "") return
+		stream_close("nginx-proxy/" name, name)
+		generated[name] = 1
+	}
+
+	BEGIN {
+		stream_open("default.conf")
+	}
+
+	/^#@file / {
+		flush()
+		name = sanitize(substr($0, 8))
+		stream_open("nginx-proxy/" name)
+		stream_write("default.conf", "include " glob_escape(conf_dir "/nginx-proxy/" name) ";")
+		next
+	}
+
+	/^#@report / {
+		print substr($0, 10) > (staging "/nginx-proxy/report")
+		report = 1
+		next
+	}
+
+	compact && /^[ \t]*$/ {
+		next
+	}
+
+	{
+		if (name == "") stream_write("default.conf", $0)
+		else stream_write("nginx-proxy/" name, $0)
+	}
+
+	END {
+		flush()
+		stream_close("default.conf", "default.conf")
+		if (report) {
+			close(staging "/nginx-proxy/report")
+			stage("nginx-proxy/report")
+		}
+		while ((getline name < (staging "/installed")) > 0) {
+			if (name in generated) continue
+			print name > (staging "/removed")
+			print "removed", name
+		}
+	}
+	' "$GENERATED" > "${STAGING}/manifest"
+
+# Move the staged files in place with a single mv per directory, deepest
+# directories first so that default.conf only includes installed files.
+find "$STAGING" -name .moved | sort -r | while IFS= read -r list; do
+	dir="${list%/.moved}"
+	(cd "$dir" && tr '\n' '\0' < .moved | xargs -0 -r sh -c 'mv -f -- "$@" "$0"' "${CONF_DIR}${dir#"$STAGING"}")
+done
+
+if [[ -s "${STAGING}/removed" ]]; then
+	(cd "$SPLIT_DIR" && tr '\n' '\0' < "${STAGING}/removed" | xargs -0 -r rm -f --)
+fi
+
+mv -f "${STAGING}/manifest" "$MANIFEST"
+rm -rf "$STAGING"
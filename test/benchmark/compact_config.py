@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Measure the configuration size and nginx parse time saved by COMPACT_CONFIG.
+
+For each fleet size, the template is rendered with and without COMPACT_CONFIG.
+The compact output is post-processed the same way /app/update-config.sh does:
+the "#@report " diagnostic lines are moved out of the configuration and blank
+lines are dropped. If nginx is available (in the PATH or given with --nginx),
+the time `nginx -t` takes to parse each configuration is reported too.
+
+    ./compact_config.py --sizes 1000,5000,10000
+
+docker-gen must be available in the PATH (or given with --docker-gen).
+"""
+import argparse
+import dataclasses
+import json
+import pathlib
+import shutil
+import sys
+from typing import List, Optional, Tuple
+
+from fleet import synthetic_fleet
+from nginx_parse import parse_time
+from render_scaling import DEFAULT_TEMPLATE, generate
+
+
+DEFAULT_SIZES = "1000,5000,10000"
+
+REPORT_PREFIX = b"#@report "
+
+
+@dataclasses.dataclass
+class CompactResult:
+    containers: int
+    full_bytes: int
+    full_lines: int
+    compact_bytes: int
+    compact_lines: int
+    report_bytes: int
+    full_parse_time: Optional[float] = None
+    compact_parse_time: Optional[float] = None
+
+
+def compact(conf: bytes) -> Tuple[bytes, bytes]:
+    """
+    Split a configuration generated with COMPACT_CONFIG into the nginx
+    configuration and the diagnostic report, like /app/update-config.sh does.
+    """
+    kept, report = [], []
+    for line in conf.splitlines(keepends=True):
+        if line.startswith(REPORT_PREFIX):
+            report.append(line[len(REPORT_PREFIX):])
+        elif line.strip():
+            kept.append(line)
+    return b"".join(kept), b"".join(report)
+
+
+def print_table(results: List[CompactResult]):
+    header = (
+        f"{'containers':>10} {'full (KiB)':>10} {'compact (KiB)':>13} {'saved':>6} "
+        f"{'full lines':>10} {'compact lines':>13} {'report (KiB)':>12} "
+        f"{'full parse (s)':>14} {'compact parse (s)':>17}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        full_parse = f"{r.full_parse_time:>14.3f}" if r.full_parse_time is not None else f"{'n/a':>14}"
+        compact_parse = f"{r.compact_parse_time:>17.3f}" if r.compact_parse_time is not None else f"{'n/a':>17}"
+        print(
+            f"{r.containers:>10} {r.full_bytes / 1024:>10.1f} {r.compact_bytes / 1024:>13.1f} "
+            f"{1 - r.compact_bytes / r.full_bytes:>6.0%} {r.full_lines:>10} {r.compact_lines:>13} "
+            f"{r.report_bytes / 1024:>12.1f} {full_parse} {compact_parse}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma separated fleet sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--template", type=pathlib.Path, default=DEFAULT_TEMPLATE, help="template to render (default: the repository nginx.tmpl)")
+    parser.add_argument("--docker-gen", default=shutil.which("docker-gen"), help="path to the docker-gen binary")
+    parser.add_argument("--nginx", default=shutil.which("nginx"), help="path to the nginx binary used to measure the parse time")
+    parser.add_argument("--repeat", type=int, default=3, help="nginx -t runs per configuration, the fastest one is reported")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic fleet generator")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if not args.docker_gen:
+        parser.error("docker-gen was not found in the PATH, use --docker-gen")
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        containers = synthetic_fleet(size, seed=args.seed)
+        full, _, _ = generate(args.docker_gen, args.template, containers)
+        compact_conf, report = compact(generate(args.docker_gen, args.template, containers, {"COMPACT_CONFIG": "true"})[0])
+        result = CompactResult(
+            containers=size,
+            full_bytes=len(full),
+            full_lines=full.count(b"\n"),
+            compact_bytes=len(compact_conf),
+            compact_lines=compact_conf.count(b"\n"),
+            report_bytes=len(report),
+        )
+        if args.nginx:
+            result.full_parse_time = parse_time(args.nginx, full, args.repeat)
+            result.compact_parse_time = parse_time(args.nginx, compact_conf, args.repeat)
+        results.append(result)
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps([dataclasses.asdict(r) for r in results], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
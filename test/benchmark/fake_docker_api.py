@@ -0,0 +1,166 @@
+"""
+Minimal fake Docker Engine API serving a static container inventory over a
+unix socket.
+
+It only implements the read-only endpoints docker-gen relies on when it renders
+a template once (`docker-gen -only-once`): version, info, container list,
+container inspect and network list.
+"""
+import http.server
+import json
+import os
+import re
+import socketserver
+import threading
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+
+API_VERSION = "1.41"
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_UnixHTTPServer"
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        api: FakeDockerAPI = self.server.api
+        # Strip the optional /v1.xx API version prefix
+        path = re.sub(r"^/v\d+\.\d+", "", urlsplit(self.path).path)
+
+        if path == "/_ping":
+            return self._send(200, "OK", content_type="text/plain")
+        if path == "/version":
+            return self._send(200, api.version())
+        if path == "/info":
+            return self._send(200, api.info())
+        if path == "/containers/json":
+            return self._send(200, api.list_containers())
+        if path == "/networks":
+            return self._send(200, api.list_networks())
+
+        match = re.match(r"^/containers/(?P<id>[^/]+)/json$", path)
+        if match:
+            container = api.containers.get(match.group("id"))
+            if container is None:
+                return self._send(404, {"message": f"No such container: {match.group('id')}"})
+            return self._send(200, container)
+
+        match = re.match(r"^/networks/(?P<id>[^/]+)$", path)
+        if match:
+            network = api.networks.get(match.group("id"))
+            if network is None:
+                return self._send(404, {"message": f"network {match.group('id')} not found"})
+            return self._send(200, network)
+
+        self._send(404, {"message": f"page not found: {path}"})
+
+    def _send(self, status: int, body, content_type: str = "application/json"):
+        payload = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Api-Version", API_VERSION)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def address_string(self):
+        # unix socket peers have no address
+        return "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeDockerAPI:
+    """
+    Serve the given `docker inspect`-like container documents on a unix socket:
+
+        with FakeDockerAPI("/tmp/docker.sock", containers) as api:
+            subprocess.run(["docker-gen", "-only-once", "-endpoint", api.endpoint, ...])
+    """
+    def __init__(self, socket_path: str, containers: List[dict]):
+        self.socket_path = socket_path
+        self.containers: Dict[str, dict] = {c["Id"]: c for c in containers}
+        self.networks: Dict[str, dict] = {}
+        for container in containers:
+            for name, settings in container["NetworkSettings"]["Networks"].items():
+                self.networks.setdefault(name, {
+                    "Name": name,
+                    "Id": settings["NetworkID"],
+                    "Driver": "bridge",
+                    "Scope": "local",
+                    "Internal": False,
+                })
+        self._server = None
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"unix://{self.socket_path}"
+
+    def version(self) -> dict:
+        return {
+            "Version": "fake",
+            "ApiVersion": API_VERSION,
+            "MinAPIVersion": "1.12",
+            "Os": "linux",
+            "Arch": "amd64",
+        }
+
+    def info(self) -> dict:
+        return {
+            "Name": "nginx-proxy-benchmark",
+            "Containers": len(self.containers),
+            "ContainersRunning": len(self.containers),
+            "Images": 1,
+            "ServerVersion": "fake",
+            "OperatingSystem": "fake",
+        }
+
+    def list_containers(self) -> List[dict]:
+        return [
+            {
+                "Id": c["Id"],
+                "Names": [c["Name"]],
+                "Image": c["Config"]["Image"],
+                "Labels": c["Config"]["Labels"],
+                "State": "running",
+                "Status": "Up",
+            }
+            for c in self.containers.values()
+        ]
+
+    def list_networks(self) -> List[dict]:
+        return list(self.networks.values())
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = _UnixHTTPServer(self.socket_path, _Handler)
+        self._server.api = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> "FakeDockerAPI":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
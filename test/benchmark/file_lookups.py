@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Compare the render time and the file system lookups of two versions of
+nginx.tmpl, such as before and after a change of the way the template looks for
+certificates, vhost.d, htpasswd and nginx configuration files.
+
+For each fleet size, both templates are rendered by docker-gen. When strace is
+available (in the PATH or given with --strace), the stat system calls made by
+docker-gen during one more render of each template are counted too, along with
+the failed ones (lookups of missing files).
+
+The lookups only reach the file system for the directories that exist, so the
+results are only representative where /etc/nginx/certs, /etc/nginx/vhost.d and
+/etc/nginx/htpasswd exist, for instance in a nginx-proxy container. --populate
+creates empty certificate and key files for a share of the synthetic virtual
+hosts in /etc/nginx/certs first: only use it in a throwaway container.
+
+    git show HEAD~1:nginx.tmpl > /tmp/baseline.tmpl
+    ./file_lookups.py --baseline /tmp/baseline.tmpl --sizes 1000,5000
+
+docker-gen must be available in the PATH (or given with --docker-gen).
+"""
+import argparse
+import dataclasses
+import json
+import pathlib
+import random
+import shutil
+import sys
+import tempfile
+from typing import List, Optional, Tuple
+
+from fleet import synthetic_fleet
+from render_scaling import DEFAULT_TEMPLATE, generate
+
+
+DEFAULT_SIZES = "1000,5000"
+CERTS_DIR = pathlib.Path("/etc/nginx/certs")
+
+
+@dataclasses.dataclass
+class LookupResult:
+    template: str
+    containers: int
+    wall_time: float
+    stat_calls: Optional[int]
+    failed_stat_calls: Optional[int]
+
+
+def virtual_hosts(containers: List[dict]) -> List[str]:
+    """
+    Return the plain (non regexp) VIRTUAL_HOST values of the containers.
+    """
+    hosts = set()
+    for container in containers:
+        for variable in container["Config"]["Env"]:
+            name, _, value = variable.partition("=")
+            if name == "VIRTUAL_HOST":
+                hosts.update(host.strip() for host in value.split(",") if host.strip() and not host.startswith("~"))
+    return sorted(hosts)
+
+
+def populate(hosts: List[str], ratio: float, seed: int):
+    """
+    Create empty certificate and key files for a share of the hosts.
+    """
+    CERTS_DIR.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for host in hosts:
+        if rng.random() < ratio:
+            for extension in ("crt", "key"):
+                CERTS_DIR.joinpath(f"{host}.{extension}").touch()
+
+
+def count_stats(strace: str, docker_gen: str, template: pathlib.Path, containers: List[dict]) -> Tuple[int, int]:
+    """
+    Render the template once under strace and return the number of stat calls
+    and of failed stat calls.
+    """
+    with tempfile.NamedTemporaryFile(prefix="nginx-proxy-strace-") as summary:
+        generate(docker_gen, template, containers, wrapper=[strace, "-f", "-c", "-e", "trace=%stat,%lstat", "-o", summary.name])
+        for line in pathlib.Path(summary.name).read_text().splitlines():
+            fields = line.split()
+            if fields and fields[-1] == "total":
+                # % time, seconds, [usecs/call,] calls, [errors,] total: the
+                # usecs/call column is empty on the total line
+                calls = int(fields[2])
+                errors = int(fields[3]) if len(fields) == 5 else 0
+                return calls, errors
+    return 0, 0
+
+
+def print_table(results: List[LookupResult]):
+    header = f"{'template':>12} {'containers':>10} {'wall time (s)':>13} {'stat calls':>10} {'failed':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        stat_calls = "n/a" if r.stat_calls is None else str(r.stat_calls)
+        failed = "n/a" if r.failed_stat_calls is None else str(r.failed_stat_calls)
+        print(f"{r.template:>12} {r.containers:>10} {r.wall_time:>13.3f} {stat_calls:>10} {failed:>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=pathlib.Path, required=True, help="template to compare with")
+    parser.add_argument("--template", type=pathlib.Path, default=DEFAULT_TEMPLATE, help="template to render (default: the repository nginx.tmpl)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma separated fleet sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--docker-gen", default=shutil.which("docker-gen"), help="path to the docker-gen binary")
+    parser.add_argument("--strace", default=shutil.which("strace"), help="path to the strace binary, to count the stat calls")
+    parser.add_argument("--repeat", type=int, default=3, help="renders per template and size, the fastest one is reported")
+    parser.add_argument("--populate", type=float, metavar="RATIO", help="create certificates for this share of the virtual hosts in /etc/nginx/certs")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic fleet generator")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if not args.docker_gen:
+        parser.error("docker-gen was not found in the PATH, use --docker-gen")
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        containers = synthetic_fleet(size, seed=args.seed)
+        if args.populate:
+            populate(virtual_hosts(containers), args.populate, args.seed)
+        for name, template in (("baseline", args.baseline), ("template", args.template)):
+            wall_time = min(generate(args.docker_gen, template, containers)[1] for _ in range(args.repeat))
+            stat_calls = failed = None
+            if args.strace:
+                stat_calls, failed = count_stats(args.strace, args.docker_gen, template, containers)
+            results.append(LookupResult(template=name, containers=size, wall_time=wall_time, stat_calls=stat_calls, failed_stat_calls=failed))
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps([dataclasses.asdict(r) for r in results], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Synthetic container inventories for the benchmarks.
+
+The generated documents mimic the output of `docker inspect` closely enough for
+docker-gen to build its RuntimeContainer structs from them.
+"""
+import hashlib
+import ipaddress
+import random
+from typing import Dict, List
+
+
+NGINX_PROXY_LABEL = "com.github.nginx-proxy.nginx-proxy.nginx"
+
+# Share of services using each way of declaring virtual hosts. The remainder
+# uses plain VIRTUAL_HOST lists.
+MULTIPORTS_SHARE = 0.15
+VIRTUAL_PATH_SHARE = 0.15
+REGEXP_SHARE = 0.05
+
+# Number of containers attached to each docker network
+CONTAINERS_PER_NETWORK = 250
+
+
+def _container_id(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+class _Networks:
+    """Hand out one subnet per network and sequential IPs within it."""
+    def __init__(self):
+        self._next_ip: Dict[str, ipaddress.IPv4Address] = {}
+        self._gateway: Dict[str, str] = {}
+
+    def attach(self, name: str) -> dict:
+        if name not in self._next_ip:
+            subnet = ipaddress.ip_network(f"10.{len(self._next_ip) % 250 + 1}.0.0/16")
+            self._gateway[name] = str(subnet.network_address + 1)
+            self._next_ip[name] = subnet.network_address + 2
+        ip = self._next_ip[name]
+        self._next_ip[name] = ip + 1
+        return {
+            "NetworkID": hashlib.sha256(name.encode()).hexdigest(),
+            "EndpointID": hashlib.sha256(f"{name}{ip}".encode()).hexdigest(),
+            "Gateway": self._gateway[name],
+            "IPAddress": str(ip),
+            "IPPrefixLen": 16,
+            "IPv6Gateway": "",
+            "GlobalIPv6Address": "",
+            "GlobalIPv6PrefixLen": 0,
+            "MacAddress": "02:42:00:00:00:00",
+            "Aliases": None,
+        }
+
+
+def _container(name: str, env: Dict[str, str], labels: Dict[str, str], ports: List[str], networks: Dict[str, dict]) -> dict:
+    first_network = next(iter(networks.values()), {})
+    return {
+        "Id": _container_id(name),
+        "Name": f"/{name}",
+        "Created": "2024-01-01T00:00:00.000000000Z",
+        "State": {"Status": "running", "Running": True},
+        "Config": {
+            "Hostname": _container_id(name)[:12],
+            "Image": "web:latest",
+            "Env": [f"{key}={value}" for key, value in env.items()],
+            "Labels": labels,
+        },
+        "HostConfig": {"NetworkMode": next(iter(networks), "default")},
+        "NetworkSettings": {
+            "IPAddress": "",
+            "Gateway": first_network.get("Gateway", ""),
+            "Ports": {f"{port}/tcp": None for port in ports},
+            "Networks": networks,
+        },
+        "Mounts": [],
+    }
+
+
+def synthetic_fleet(size: int, seed: int = 0) -> List[dict]:
+    """
+    Return `size` proxied containers plus the nginx-proxy container itself.
+
+    Containers are grouped in services of one to four replicas sharing the same
+    virtual host configuration. Services mix comma separated VIRTUAL_HOST lists,
+    VIRTUAL_HOST_MULTIPORTS YAML, VIRTUAL_PATH and regexp hosts, and are spread
+    over several docker networks, some of them attached to two networks.
+    """
+    rng = random.Random(seed)
+    networks = _Networks()
+    network_count = max(1, size // CONTAINERS_PER_NETWORK)
+    network_names = [f"net{index}" for index in range(network_count)]
+
+    containers = []
+    service = 0
+    while len(containers) < size:
+        service += 1
+        replicas = min(rng.randint(1, 4), size - len(containers))
+        domain = f"svc{service}.example.com"
+        env: Dict[str, str] = {}
+        ports = ["80"]
+        kind = rng.random()
+
+        if kind < MULTIPORTS_SHARE:
+            ports = ["8000", "9000"]
+            env["VIRTUAL_HOST_MULTIPORTS"] = "\n".join((
+                f"{domain}:",
+                "  \"/\":",
+                "    port: 8000",
+                "  \"/admin\":",
+                "    port: 9000",
+                "    dest: \"/\"",
+                f"api.{domain}:",
+            ))
+        elif kind < MULTIPORTS_SHARE + VIRTUAL_PATH_SHARE:
+            # Services sharing a hostname, routed by path
+            env["VIRTUAL_HOST"] = f"paths{service // 4}.example.com"
+            env["VIRTUAL_PATH"] = f"/svc{service}/"
+            env["VIRTUAL_DEST"] = "/"
+        elif kind < MULTIPORTS_SHARE + VIRTUAL_PATH_SHARE + REGEXP_SHARE:
+            env["VIRTUAL_HOST"] = f"~^svc{service}-[a-z0-9]+\\.example\\.com$"
+        else:
+            hosts = [domain, f"www.{domain}", f"alt{service}.example.net"][:rng.randint(1, 3)]
+            env["VIRTUAL_HOST"] = ",".join(hosts)
+            if rng.random() < 0.2:
+                ports = ["8080", "8443"]
+                env["VIRTUAL_PORT"] = "8080"
+
+        attached = rng.sample(network_names, k=min(len(network_names), rng.choice((1, 1, 1, 2))))
+        for replica in range(1, replicas + 1):
+            name = f"svc{service}-{replica}"
+            container_networks = {network: networks.attach(network) for network in attached}
+            labels = {
+                "com.docker.compose.project": "benchmark",
+                "com.docker.compose.service": f"svc{service}",
+            }
+            containers.append(_container(name, env, labels, ports, container_networks))
+
+    proxy_networks = {network: networks.attach(network) for network in network_names}
+    containers.append(_container("nginx-proxy", {}, {NGINX_PROXY_LABEL: ""}, ["80", "443"], proxy_networks))
+    return containers
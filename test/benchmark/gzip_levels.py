@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Measure the bandwidth saved by gzip compression and the CPU time it costs at
+each compression level (GZIP_COMP_LEVEL / gzip.comp-level label).
+
+The payloads are compressed with zlib using the same parameters as nginx's gzip
+module (32K window, memory level 8), so the compression ratios match what nginx
+sends and the CPU times are representative of what each nginx worker spends.
+Synthetic JSON API, HTML, CSS and JavaScript responses are used unless response
+bodies are given with --payload.
+
+    ./gzip_levels.py
+    ./gzip_levels.py --payload response.json --payload index.html
+"""
+import argparse
+import dataclasses
+import json
+import pathlib
+import random
+import sys
+import time
+import zlib
+from typing import Dict, List, Optional
+
+
+DEFAULT_LEVELS = "1,2,3,4,5,6,7,8,9"
+
+# zlib parameters matching nginx's gzip_window (32k) and gzip_buffers defaults,
+# with a gzip header (16 + 15 bits window)
+WBITS = 16 + 15
+MEM_LEVEL = 8
+
+
+@dataclasses.dataclass
+class LevelResult:
+    payload: str
+    level: int
+    original_bytes: int
+    compressed_bytes: int
+    cpu_ms_per_mib: float
+
+    @property
+    def saved(self) -> float:
+        return 1 - self.compressed_bytes / self.original_bytes
+
+
+def synthetic_payloads(seed: int = 0) -> Dict[str, bytes]:
+    """
+    Return typical response bodies of a few hundred KiB each.
+    """
+    rng = random.Random(seed)
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliett"]
+
+    items = [
+        {
+            "id": index,
+            "name": " ".join(rng.choices(words, k=3)),
+            "email": f"user{index}@example.com",
+            "active": rng.random() < 0.8,
+            "score": round(rng.uniform(0, 100), 2),
+            "tags": rng.sample(words, k=rng.randint(0, 4)),
+            "created_at": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z",
+        }
+        for index in range(2000)
+    ]
+    api = json.dumps({"count": len(items), "results": items}).encode()
+
+    rows = "".join(
+        f'<tr class="row-{index % 2}"><td>{item["id"]}</td><td><a href="/users/{item["id"]}">{item["name"]}</a></td>'
+        f'<td>{item["email"]}</td><td>{item["score"]}</td></tr>\n'
+        for index, item in enumerate(items)
+    )
+    html = f"<!DOCTYPE html>\n<html><head><title>Users</title></head><body><table>\n{rows}</table></body></html>\n".encode()
+
+    css = "".join(
+        f".component-{index} {{ margin: {index % 16}px; padding: {index % 8}px {index % 12}px; color: #{rng.randrange(0xffffff):06x}; }}\n"
+        f".component-{index}:hover {{ background-color: #{rng.randrange(0xffffff):06x}; }}\n"
+        for index in range(3000)
+    ).encode()
+
+    js = "".join(
+        f"function handler{index}(event) {{ const value = event.target.value; if (value.length > {index % 32}) {{ "
+        f"return fetch('/api/{rng.choice(words)}/' + value).then((response) => response.json()); }} return null; }}\n"
+        for index in range(2000)
+    ).encode()
+
+    return {"json": api, "html": html, "css": css, "js": js}
+
+
+def compress(payload: bytes, level: int) -> int:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS, MEM_LEVEL)
+    return len(compressor.compress(payload) + compressor.flush())
+
+
+def measure(name: str, payload: bytes, level: int, repeat: int) -> LevelResult:
+    """
+    Compress `payload` `repeat` times at `level` and keep the fastest run.
+    """
+    compressed_bytes = 0
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        compressed_bytes = compress(payload, level)
+        best = min(best, time.process_time() - start)
+    return LevelResult(
+        payload=name,
+        level=level,
+        original_bytes=len(payload),
+        compressed_bytes=compressed_bytes,
+        cpu_ms_per_mib=best * 1000 / (len(payload) / 1024 / 1024),
+    )
+
+
+def print_table(results: List[LevelResult]):
+    header = f"{'payload':>10} {'level':>5} {'original (KiB)':>14} {'gzip (KiB)':>10} {'saved':>6} {'CPU (ms/MiB)':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.payload:>10} {r.level:>5} {r.original_bytes / 1024:>14.1f} {r.compressed_bytes / 1024:>10.1f} "
+            f"{r.saved:>6.1%} {r.cpu_ms_per_mib:>12.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help=f"comma separated compression levels (default: {DEFAULT_LEVELS})")
+    parser.add_argument("--payload", type=pathlib.Path, action="append", default=[], help="response body to compress instead of the synthetic ones (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="compressions per payload and level, the fastest one is reported")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic payloads generator")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.payload:
+        payloads = {path.name: path.read_bytes() for path in args.payload}
+    else:
+        payloads = synthetic_payloads(seed=args.seed)
+
+    results = [
+        measure(name, payload, int(level), args.repeat)
+        for name, payload in payloads.items()
+        for level in args.levels.split(",")
+    ]
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps([{**dataclasses.asdict(r), "saved": r.saved} for r in results], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
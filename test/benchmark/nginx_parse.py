@@ -0,0 +1,43 @@
+"""
+Measure how long nginx takes to parse a generated configuration.
+
+The configuration is checked with `nginx -t` inside a minimal main
+configuration, which is the parsing work nginx does on every reload.
+"""
+import pathlib
+import subprocess
+import tempfile
+import time
+
+
+MAIN_CONF = """\
+pid {tmpdir}/nginx.pid;
+error_log {tmpdir}/error.log;
+events {{
+}}
+http {{
+    include {tmpdir}/default.conf;
+}}
+"""
+
+
+def parse_time(nginx: str, conf: bytes, repeat: int = 3) -> float:
+    """
+    Return the fastest of `repeat` `nginx -t` runs on the given http level
+    configuration, in seconds.
+    """
+    with tempfile.TemporaryDirectory(prefix="nginx-proxy-bench-") as tmpdir:
+        # Keep the log files opened by nginx -t out of /var/log/nginx
+        pathlib.Path(tmpdir, "default.conf").write_bytes(conf.replace(b"/var/log/nginx/", f"{tmpdir}/".encode()))
+        main_conf = pathlib.Path(tmpdir, "nginx.conf")
+        main_conf.write_text(MAIN_CONF.format(tmpdir=tmpdir))
+        cmd = [nginx, "-t", "-q", "-p", f"{tmpdir}/", "-e", f"{tmpdir}/error.log", "-c", main_conf.as_posix()]
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            timings.append(time.perf_counter() - start)
+            if process.returncode != 0:
+                raise RuntimeError(f"nginx -t failed (exit code {process.returncode}):\n{process.stdout.decode(errors='replace')}")
+    return min(timings)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Measure the request latency of nginx with 10, 100 and 1000 regexp virtual hosts
+(VIRTUAL_HOST values starting with ~), with and without PCRE JIT, and with the
+wildcard server names nginx-proxy rewrites the simplest regexps into.
+
+nginx evaluates the regexp server names one by one, in the order of the
+configuration, for every request whose host matches neither an exact nor a
+wildcard server name. For each number of regexp virtual hosts, a local nginx
+serves a configuration with one exact and that many server names of a kind:
+
+    regexp          ~^(www\.)?svc<n>-[a-z0-9]+\.example\.com$
+    leading-regexp  ~^.+\.svc<n>\.example\.com$ (as written by users)
+    wildcard        *.svc<n>.example.com (as rewritten by nginx-proxy)
+
+Requests are sent over a kept alive connection with the Host header of:
+
+    exact    the exact server name (hash lookup, no regexp evaluated)
+    first    the first server name
+    last     the last server name (every regexp evaluated)
+    unknown  no server name (every regexp evaluated, then the default server)
+
+    ./regexp_vhosts.py
+    ./regexp_vhosts.py --counts 10,100,1000,5000 --requests 5000 --kind leading-regexp --kind wildcard --pcre-jit on
+
+nginx must be available in the PATH (or given with --nginx).
+"""
+import argparse
+import dataclasses
+import http.client
+import json
+import pathlib
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+
+DEFAULT_COUNTS = "10,100,1000"
+
+# Server name and matching host of each kind
+KINDS = {
+    "regexp": ("~^(www\\.)?svc{index}-[a-z0-9]+\\.example\\.com$", "svc{index}-abc.example.com"),
+    "leading-regexp": ("~^.+\\.svc{index}\\.example\\.com$", "www.svc{index}.example.com"),
+    "wildcard": ("*.svc{index}.example.com", "www.svc{index}.example.com"),
+}
+
+MAIN_CONF = """\
+daemon off;
+master_process off;
+pid {tmpdir}/nginx.pid;
+error_log {tmpdir}/error.log;
+pcre_jit {pcre_jit};
+events {{
+}}
+http {{
+    access_log off;
+    # Sized like nginx-proxy does
+    server_names_hash_bucket_size 256;
+    server_names_hash_max_size {max_size};
+    server {{
+        listen 127.0.0.1:{port} default_server;
+        server_name _;
+        return 503;
+    }}
+    server {{
+        listen 127.0.0.1:{port};
+        server_name exact.example.com;
+        return 200;
+    }}
+{servers}
+}}
+"""
+
+SERVER = """\
+    server {{
+        listen 127.0.0.1:{port};
+        server_name {server_name};
+        return 200;
+    }}
+"""
+
+
+@dataclasses.dataclass
+class RegexpResult:
+    kind: str
+    server_names: int
+    pcre_jit: str
+    target: str
+    requests: int
+    median_us: float
+    p99_us: float
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def hosts(kind: str, count: int) -> Dict[str, str]:
+    host = KINDS[kind][1]
+    return {
+        "exact": "exact.example.com",
+        "first": host.format(index=0),
+        "last": host.format(index=count - 1),
+        "unknown": "unknown.example.com",
+    }
+
+
+def measure(port: int, host: str, expected_status: int, requests: int) -> List[float]:
+    """
+    Send the requests over a single kept alive connection and return their
+    latencies in seconds.
+    """
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    latencies = []
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            connection.request("GET", "/", headers={"Host": host})
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            if response.status != expected_status:
+                raise RuntimeError(f"unexpected status {response.status} for host {host}")
+    finally:
+        connection.close()
+    return latencies
+
+
+def run(nginx: str, kind: str, count: int, pcre_jit: str, requests: int) -> List[RegexpResult]:
+    with tempfile.TemporaryDirectory(prefix="nginx-proxy-bench-") as tmpdir:
+        port = free_port()
+        server_name = KINDS[kind][0]
+        servers = "".join(SERVER.format(port=port, server_name=server_name.format(index=index)) for index in range(count))
+        main_conf = pathlib.Path(tmpdir, "nginx.conf")
+        max_size = max(512, 1 << (count - 1).bit_length())
+        main_conf.write_text(MAIN_CONF.format(tmpdir=tmpdir, port=port, pcre_jit=pcre_jit, max_size=max_size, servers=servers))
+        process = subprocess.Popen(
+            [nginx, "-p", f"{tmpdir}/", "-e", f"{tmpdir}/error.log", "-c", main_conf.as_posix()],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if process.poll() is not None:
+                        error_log = pathlib.Path(tmpdir, "error.log")
+                        raise RuntimeError(f"nginx failed to start:\n{error_log.read_text() if error_log.is_file() else ''}")
+                    time.sleep(0.05)
+
+            results = []
+            for target, host in hosts(kind, count).items():
+                # Warm up
+                measure(port, host, 503 if target == "unknown" else 200, 100)
+                latencies = measure(port, host, 503 if target == "unknown" else 200, requests)
+                results.append(RegexpResult(
+                    kind=kind,
+                    server_names=count,
+                    pcre_jit=pcre_jit,
+                    target=target,
+                    requests=requests,
+                    median_us=statistics.median(latencies) * 1_000_000,
+                    p99_us=statistics.quantiles(latencies, n=100)[98] * 1_000_000,
+                ))
+            return results
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def print_table(results: List[RegexpResult]):
+    header = f"{'kind':>14} {'names':>6} {'pcre_jit':>8} {'host':>8} {'requests':>8} {'median (us)':>11} {'p99 (us)':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.kind:>14} {r.server_names:>6} {r.pcre_jit:>8} {r.target:>8} {r.requests:>8} "
+            f"{r.median_us:>11.1f} {r.p99_us:>9.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", default=DEFAULT_COUNTS, help=f"comma separated numbers of server names (default: {DEFAULT_COUNTS})")
+    parser.add_argument("--kind", action="append", choices=list(KINDS), default=[], help=f"kind of server names (repeatable, default: {' '.join(KINDS)})")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per host, the median and 99th percentile latencies are reported (default: 2000)")
+    parser.add_argument("--pcre-jit", choices=("on", "off", "both"), default="both", help="pcre_jit setting of nginx (default: both)")
+    parser.add_argument("--nginx", default=shutil.which("nginx"), help="path to the nginx binary")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if not args.nginx:
+        parser.error("nginx was not found in the PATH, use --nginx")
+
+    results = []
+    for kind in args.kind or list(KINDS):
+        for count in (int(c) for c in args.counts.split(",")):
+            for pcre_jit in (("off", "on") if args.pcre_jit == "both" else (args.pcre_jit,)):
+                results.extend(run(args.nginx, kind, count, pcre_jit, args.requests))
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps([dataclasses.asdict(r) for r in results], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
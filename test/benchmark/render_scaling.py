@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Measure how rendering nginx.tmpl scales with the number of proxied containers.
+
+For each fleet size, a synthetic container inventory is served by a fake Docker
+Engine API and docker-gen renders the template once (-only-once). The wall time,
+peak memory (max RSS) of docker-gen, size of the generated configuration and its
+number of server / upstream blocks are reported.
+
+    ./render_scaling.py --sizes 1000,5000,10000,20000
+
+docker-gen must be available in the PATH (or given with --docker-gen).
+"""
+import argparse
+import dataclasses
+import json
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fake_docker_api import FakeDockerAPI
+from fleet import synthetic_fleet
+
+
+DEFAULT_TEMPLATE = pathlib.Path(__file__).parent.parent.parent.joinpath("nginx.tmpl")
+DEFAULT_SIZES = "1000,2000,5000,10000,20000"
+
+SERVER_BLOCK = re.compile(rb"^\s*server\s*\{", re.MULTILINE)
+UPSTREAM_BLOCK = re.compile(rb"^\s*upstream\s+\S+\s*\{", re.MULTILINE)
+
+
+@dataclasses.dataclass
+class RenderResult:
+    containers: int
+    wall_time: float
+    max_rss_kib: int
+    output_bytes: int
+    server_blocks: int
+    upstream_blocks: int
+
+
+def generate(
+    docker_gen: str,
+    template: pathlib.Path,
+    containers: List[dict],
+    env: Optional[Dict[str, str]] = None,
+    wrapper: Optional[List[str]] = None,
+) -> Tuple[bytes, float, int]:
+    """
+    Render `template` once with docker-gen against the given container inventory.
+    docker-gen is run through the `wrapper` command (such as strace) if given.
+
+    Return the generated configuration, the wall time and the max RSS (KiB) of docker-gen.
+    """
+    with tempfile.TemporaryDirectory(prefix="nginx-proxy-bench-") as tmpdir:
+        output = pathlib.Path(tmpdir, "default.conf")
+        with FakeDockerAPI(os.path.join(tmpdir, "docker.sock"), containers) as api:
+            cmd = [*(wrapper or []), docker_gen, "-only-once", "-endpoint", api.endpoint, template.as_posix(), output.as_posix()]
+            start = time.perf_counter()
+            process = subprocess.Popen(
+                cmd,
+                env={**os.environ, **(env or {})},
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+            # wait4() rather than wait() to get the resource usage of this child only
+            _, status, rusage = os.wait4(process.pid, 0)
+            wall_time = time.perf_counter() - start
+            logs = process.stdout.read().decode(errors="replace")
+            process.stdout.close()
+            process.returncode = os.waitstatus_to_exitcode(status)
+
+        if process.returncode != 0 or not output.is_file():
+            raise RuntimeError(f"docker-gen failed (exit code {process.returncode}):\n{logs}")
+
+        return output.read_bytes(), wall_time, rusage.ru_maxrss
+
+
+def render(docker_gen: str, template: pathlib.Path, containers: List[dict], env: Optional[Dict[str, str]] = None) -> RenderResult:
+    """
+    Render `template` once with docker-gen and measure the generated configuration.
+    """
+    conf, wall_time, max_rss_kib = generate(docker_gen, template, containers, env)
+    return RenderResult(
+        containers=len(containers),
+        wall_time=wall_time,
+        max_rss_kib=max_rss_kib,
+        output_bytes=len(conf),
+        server_blocks=len(SERVER_BLOCK.findall(conf)),
+        upstream_blocks=len(UPSTREAM_BLOCK.findall(conf)),
+    )
+
+
+def print_table(results: List[RenderResult]):
+    header = f"{'containers':>10} {'wall time (s)':>13} {'max RSS (MiB)':>13} {'output (KiB)':>12} {'servers':>8} {'upstreams':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.containers:>10} {r.wall_time:>13.3f} {r.max_rss_kib / 1024:>13.1f} "
+            f"{r.output_bytes / 1024:>12.1f} {r.server_blocks:>8} {r.upstream_blocks:>9}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma separated fleet sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--template", type=pathlib.Path, default=DEFAULT_TEMPLATE, help="template to render (default: the repository nginx.tmpl)")
+    parser.add_argument("--docker-gen", default=shutil.which("docker-gen"), help="path to the docker-gen binary")
+    parser.add_argument("--repeat", type=int, default=1, help="renders per size, the fastest one is reported")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic fleet generator")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="environment variable passed to the template (repeatable)")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if not args.docker_gen:
+        parser.error("docker-gen was not found in the PATH, use --docker-gen")
+
+    env = dict(item.split("=", 1) for item in args.env)
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        containers = synthetic_fleet(size, seed=args.seed)
+        runs = [render(args.docker_gen, args.template, containers, env) for _ in range(args.repeat)]
+        # the nginx-proxy container itself is not part of the fleet size
+        results.append(dataclasses.replace(min(runs, key=lambda r: r.wall_time), containers=size))
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps([dataclasses.asdict(r) for r in results], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Measure the TLS session resumption ratio and the handshake latencies of a
+running nginx-proxy, to size its session cache (SSL_SESSION_CACHE and
+SSL_SESSION_TIMEOUT).
+
+Simulated clients connect to the proxy in turn and each reconnection tries to
+resume the client's previous session. With TLS 1.2, session tickets are
+disabled on the client side unless --tickets is given, so that resumptions only
+go through the session cache of the proxy. With TLS 1.3 and the default
+ssl_session_tickets off, nginx issues tickets that only refer to its session
+cache. A resumption fails (a miss) once the session was evicted from the cache
+or expired.
+
+    ./ssl_session_cache.py --host web.nginx-proxy.tld --connect 127.0.0.1
+    ./ssl_session_cache.py --host web.nginx-proxy.tld --clients 50000 --rounds 3 --tls-version 1.2
+"""
+import argparse
+import dataclasses
+import json
+import pathlib
+import socket
+import ssl
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+
+@dataclasses.dataclass
+class Result:
+    clients: int
+    rounds: int
+    handshakes: int
+    resumption_attempts: int
+    resumed: int
+    full_median_ms: float
+    resumed_median_ms: float
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.resumed / self.resumption_attempts if self.resumption_attempts else 0.0
+
+
+def client_context(tls_version: str, tickets: bool) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    version = ssl.TLSVersion.TLSv1_3 if tls_version == "1.3" else ssl.TLSVersion.TLSv1_2
+    context.minimum_version = version
+    context.maximum_version = version
+    if not tickets:
+        context.options |= ssl.OP_NO_TICKET
+    return context
+
+
+def connect(address: str, port: int, host: str, context: ssl.SSLContext, session: Optional[ssl.SSLSession]):
+    """
+    Do a handshake and a request, return the session, whether it was resumed
+    and the handshake duration in seconds.
+    """
+    with socket.create_connection((address, port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        start = time.perf_counter()
+        with context.wrap_socket(sock, server_hostname=host, session=session, do_handshake_on_connect=False) as tls:
+            tls.do_handshake()
+            duration = time.perf_counter() - start
+            tls.sendall(f"GET / HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+            # TLS 1.3 sessions are only received after the handshake, along with the response
+            while tls.recv(4096):
+                pass
+            return tls.session, tls.session_reused, duration
+
+
+def run(args: argparse.Namespace) -> Result:
+    context = client_context(args.tls_version, args.tickets)
+    sessions: List[Optional[ssl.SSLSession]] = [None] * args.clients
+    full, resumed, attempts = [], [], 0
+    for _ in range(args.rounds):
+        for client in range(args.clients):
+            attempts += sessions[client] is not None
+            session, reused, duration = connect(args.connect or args.host, args.port, args.host, context, sessions[client])
+            (resumed if reused else full).append(duration)
+            sessions[client] = session
+        if args.pause:
+            time.sleep(args.pause)
+    return Result(
+        clients=args.clients,
+        rounds=args.rounds,
+        handshakes=len(full) + len(resumed),
+        resumption_attempts=attempts,
+        resumed=len(resumed),
+        full_median_ms=statistics.median(full) * 1000 if full else 0.0,
+        resumed_median_ms=statistics.median(resumed) * 1000 if resumed else 0.0,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", required=True, help="virtual host to connect to (SNI and Host header)")
+    parser.add_argument("--connect", help="address to connect to instead of resolving --host")
+    parser.add_argument("--port", type=int, default=443, help="HTTPS port of the proxy (default: 443)")
+    parser.add_argument("--clients", type=int, default=1000, help="simulated clients, each with its own session (default: 1000)")
+    parser.add_argument("--rounds", type=int, default=2, help="connections per client (default: 2)")
+    parser.add_argument("--pause", type=float, default=0, help="seconds to wait between rounds, to test SSL_SESSION_TIMEOUT")
+    parser.add_argument("--tls-version", choices=("1.2", "1.3"), default="1.3", help="TLS version of the connections (default: 1.3)")
+    parser.add_argument("--tickets", action="store_true", help="accept session tickets instead of only resuming from the session cache")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print(f"handshakes:        {result.handshakes} ({result.clients} clients x {result.rounds} rounds)")
+    print(f"resumed:           {result.resumed}/{result.resumption_attempts} ({result.hit_ratio:.1%} hit ratio)")
+    print(f"full handshake:    {result.full_median_ms:.3f} ms (median)")
+    print(f"resumed handshake: {result.resumed_median_ms:.3f} ms (median)")
+    if args.json:
+        args.json.write_text(json.dumps({**dataclasses.asdict(result), "hit_ratio": result.hit_ratio}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Measure the server CPU time spent on full TLS handshakes with RSA and ECDSA
+certificates, to estimate the CPU saved by serving an additional ECDSA
+certificate (<cert>.ecdsa.crt and <cert>.ecdsa.key) next to the RSA one.
+
+Handshakes are done in memory between a client and a server in the same thread
+(no network), and only the CPU time of the server side is accounted for, which
+is the work an nginx worker does for each new TLS connection. Both sides use the
+OpenSSL library Python is linked against, so the results are representative of
+nginx as long as it uses a similar OpenSSL version.
+
+    ./tls_handshakes.py
+    ./tls_handshakes.py --handshakes 2000 --key rsa:2048 --key rsa:4096 --key ec:P-256 --tls-version 1.2
+"""
+import argparse
+import dataclasses
+import json
+import pathlib
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+
+DEFAULT_KEYS = ["rsa:2048", "rsa:3072", "ec:P-256", "ec:P-384"]
+
+
+@dataclasses.dataclass
+class KeyResult:
+    key: str
+    tls_version: str
+    handshakes: int
+    server_cpu_us: float
+    handshakes_per_core: float
+    relative_cpu: float = 1.0
+
+
+def certificate(directory: pathlib.Path, key: str) -> pathlib.Path:
+    """
+    Generate a self-signed certificate and its key in a single PEM file.
+    """
+    algorithm, _, parameter = key.partition(":")
+    if algorithm == "rsa":
+        options = ["-newkey", f"rsa:{parameter}"]
+    elif algorithm == "ec":
+        options = ["-newkey", "ec", "-pkeyopt", f"ec_paramgen_curve:{parameter}"]
+    else:
+        raise ValueError(f"unsupported key {key!r}, use rsa:<bits> or ec:<curve>")
+    name = key.replace(":", "-")
+    pem = directory / f"{name}.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", *options, "-nodes", "-days", "1", "-subj", "/CN=nginx-proxy.tld",
+            "-keyout", str(pem), "-out", str(directory / f"{name}.crt"),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    pem.write_text(pem.read_text() + (directory / f"{name}.crt").read_text())
+    return pem
+
+
+def contexts(pem: pathlib.Path, tls_version: str):
+    version = ssl.TLSVersion.TLSv1_3 if tls_version == "1.3" else ssl.TLSVersion.TLSv1_2
+    server = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server.load_cert_chain(pem)
+    client = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    client.check_hostname = False
+    client.verify_mode = ssl.CERT_NONE
+    for context in (server, client):
+        context.minimum_version = version
+        context.maximum_version = version
+        # Full handshakes only
+        context.options |= ssl.OP_NO_TICKET
+    return server, client
+
+
+def _step(sock: ssl.SSLObject) -> bool:
+    try:
+        sock.do_handshake()
+        return True
+    except ssl.SSLWantReadError:
+        return False
+
+
+def handshake(server_context: ssl.SSLContext, client_context: ssl.SSLContext) -> float:
+    """
+    Do a full handshake in memory and return the CPU time of the server side in seconds.
+    """
+    client_in, client_out = ssl.MemoryBIO(), ssl.MemoryBIO()
+    server_in, server_out = ssl.MemoryBIO(), ssl.MemoryBIO()
+    client = client_context.wrap_bio(client_in, client_out, server_hostname="nginx-proxy.tld")
+    server = server_context.wrap_bio(server_in, server_out, server_side=True)
+    server_cpu = 0.0
+    client_done = server_done = False
+    while not (client_done and server_done):
+        client_done = client_done or _step(client)
+        server_in.write(client_out.read())
+        start = time.thread_time()
+        server_done = server_done or _step(server)
+        server_cpu += time.thread_time() - start
+        client_in.write(server_out.read())
+    return server_cpu
+
+
+def measure(key: str, pem: pathlib.Path, tls_version: str, handshakes: int) -> KeyResult:
+    server_context, client_context = contexts(pem, tls_version)
+    # Warm up
+    for _ in range(10):
+        handshake(server_context, client_context)
+    cpu = statistics.median(handshake(server_context, client_context) for _ in range(handshakes))
+    return KeyResult(
+        key=key,
+        tls_version=tls_version,
+        handshakes=handshakes,
+        server_cpu_us=cpu * 1_000_000,
+        handshakes_per_core=1 / cpu,
+    )
+
+
+def print_table(results: List[KeyResult]):
+    header = f"{'key':>10} {'TLS':>4} {'handshakes':>10} {'server CPU (us)':>15} {'handshakes/s/core':>17} {'relative CPU':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.key:>10} {r.tls_version:>4} {r.handshakes:>10} {r.server_cpu_us:>15.1f} "
+            f"{r.handshakes_per_core:>17.0f} {r.relative_cpu:>12.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--key", action="append", default=[], help=f"certificate key, rsa:<bits> or ec:<curve> (repeatable, default: {' '.join(DEFAULT_KEYS)})")
+    parser.add_argument("--handshakes", type=int, default=500, help="full handshakes per key, the median CPU time is reported (default: 500)")
+    parser.add_argument("--tls-version", choices=("1.2", "1.3"), default="1.3", help="TLS version of the handshakes (default: 1.3)")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for key in args.key or DEFAULT_KEYS:
+            results.append(measure(key, certificate(pathlib.Path(directory), key), args.tls_version, args.handshakes))
+
+    # CPU relative to the first key (RSA 2048 by default)
+    for r in results:
+        r.relative_cpu = r.server_cpu_us / results[0].server_cpu_us
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps([dataclasses.asdict(r) for r in results], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Compare the TLS handshakes done and the request latency against an HTTPS
+backend (VIRTUAL_PROTO=https) for the ways nginx can connect to it:
+
+    full       a new connection and a full handshake per request
+               (upstream-ssl.session-reuse label set to false, keepalive disabled)
+    resumed    a new connection per request resuming the previous TLS session
+               (the default session reuse, keepalive disabled)
+    keepalive  requests sent over kept alive connections
+               (the keepalive pool of the upstream, see the keepalive labels)
+
+A local HTTPS backend with a self-signed certificate (generated with the openssl
+command) is started by the script, and counts the connections it accepts along
+with the full and resumed handshakes. Clients send SNI like nginx does with the
+upstream-ssl.server-name label enabled.
+
+    ./upstream_tls.py
+    ./upstream_tls.py --requests 2000 --tls-version 1.2
+"""
+import argparse
+import dataclasses
+import http.client
+import http.server
+import json
+import pathlib
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+
+SERVER_NAME = "backend.nginx-proxy.tld"
+MODES = ("full", "resumed", "keepalive")
+
+
+@dataclasses.dataclass
+class ModeResult:
+    mode: str
+    requests: int
+    connections: int
+    full_handshakes: int
+    resumed_handshakes: int
+    median_ms: float
+    p99_ms: float
+    total_s: float
+
+
+class Backend(http.server.ThreadingHTTPServer):
+    """
+    HTTPS server counting the TLS handshakes of the connections it accepts.
+    """
+    daemon_threads = True
+
+    def __init__(self, context: ssl.SSLContext):
+        super().__init__(("127.0.0.1", 0), BackendHandler)
+        self.context = context
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.connections = 0
+            self.full_handshakes = 0
+            self.resumed_handshakes = 0
+
+    def get_request(self):
+        sock, address = self.socket.accept()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        tls_sock = self.context.wrap_socket(sock, server_side=True)
+        with self.lock:
+            self.connections += 1
+            if tls_sock.session_reused:
+                self.resumed_handshakes += 1
+            else:
+                self.full_handshakes += 1
+        return tls_sock, address
+
+
+class BackendHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok\n"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def self_signed_certificate(directory: pathlib.Path) -> pathlib.Path:
+    """
+    Generate a self-signed certificate and its key in a single PEM file.
+    """
+    pem = directory / "backend.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+            "-nodes", "-days", "1", "-subj", f"/CN={SERVER_NAME}",
+            "-keyout", str(pem), "-out", str(directory / "cert.pem"),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    pem.write_text(pem.read_text() + (directory / "cert.pem").read_text())
+    return pem
+
+
+def client_context(tls_version: str) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    # Like nginx's default proxy_ssl_verify off
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    version = ssl.TLSVersion.TLSv1_3 if tls_version == "1.3" else ssl.TLSVersion.TLSv1_2
+    context.minimum_version = version
+    context.maximum_version = version
+    return context
+
+
+def run_mode(mode: str, port: int, context: ssl.SSLContext, requests: int) -> List[float]:
+    """
+    Send `requests` sequential requests and return their latencies in seconds.
+    """
+    latencies = []
+    session = None
+    connection = None
+    for _ in range(requests):
+        start = time.perf_counter()
+        if connection is None:
+            sock = socket.create_connection(("127.0.0.1", port))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            tls_sock = context.wrap_socket(
+                sock,
+                server_hostname=SERVER_NAME,
+                session=session if mode == "resumed" else None,
+            )
+            connection = http.client.HTTPConnection(SERVER_NAME, port)
+            connection.sock = tls_sock
+        connection.request("GET", "/", headers={"Connection": "keep-alive" if mode == "keepalive" else "close"})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if mode == "keepalive":
+            continue
+        # TLS 1.3 session tickets are only received after the handshake,
+        # along with the response
+        session = connection.sock.session
+        connection.close()
+        connection = None
+    if connection is not None:
+        connection.close()
+    return latencies
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def print_table(results: List[ModeResult]):
+    header = f"{'mode':>10} {'requests':>8} {'connections':>11} {'full':>6} {'resumed':>7} {'median (ms)':>11} {'p99 (ms)':>8} {'total (s)':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.mode:>10} {r.requests:>8} {r.connections:>11} {r.full_handshakes:>6} {r.resumed_handshakes:>7} "
+            f"{r.median_ms:>11.3f} {r.p99_ms:>8.3f} {r.total_s:>9.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="sequential requests per mode (default: 500)")
+    parser.add_argument("--tls-version", choices=("1.2", "1.3"), default="1.3", help="TLS version of the connections (default: 1.3)")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(self_signed_certificate(pathlib.Path(directory)))
+        backend = Backend(server_context)
+    threading.Thread(target=backend.serve_forever, daemon=True).start()
+    port = backend.server_address[1]
+    context = client_context(args.tls_version)
+
+    results = []
+    for mode in MODES:
+        backend.reset()
+        start = time.perf_counter()
+        latencies = run_mode(mode, port, context, args.requests)
+        total = time.perf_counter() - start
+        # Let the backend account for the last connection
+        time.sleep(0.1)
+        with backend.lock:
+            results.append(ModeResult(
+                mode=mode,
+                requests=args.requests,
+                connections=backend.connections,
+                full_handshakes=backend.full_handshakes,
+                resumed_handshakes=backend.resumed_handshakes,
+                median_ms=statistics.median(latencies) * 1000,
+                p99_ms=percentile(latencies, 0.99) * 1000,
+                total_s=total,
+            ))
+    backend.shutdown()
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps([dataclasses.asdict(r) for r in results], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
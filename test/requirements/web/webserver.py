@@ -1,19 +1,45 @@
 #!/usr/bin/env python3
 
-import os, sys, re
+import os, sys, re, time
 import http.server
 import socketserver
 
 class Handler(http.server.SimpleHTTPRequestHandler):
+    connections = 0
+
+    def setup(self):
+        Handler.connections += 1
+        super().setup()
+
+    def stream(self, events):
+        """Send server-sent events, one per second"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for event in range(events):
+            if event:
+                time.sleep(1)
+            self.wfile.write(f"data: event {event}\n\n".encode())
+            self.wfile.flush()
+
     def do_GET(self):
 
         response_body = ""
         response_code = 200
 
-        if self.path == "/headers":
+        if re.match(r"/stream/(\d+)", self.path):
+            result = re.match(r"/stream/(\d+)", self.path)
+            self.stream(int(result.group(1)))
+            return
+        elif self.path == "/headers":
             response_body += self.headers.as_string()
         elif self.path == "/port":
             response_body += f"answer from port {PORT}\n"
+        elif self.path == "/connections":
+            response_body += f"{Handler.connections} connections\n"
         elif re.match(r"/status/(\d+)", self.path):
             result = re.match(r"/status/(\d+)", self.path)
             response_code = int(result.group(1))
@@ -26,6 +52,7 @@ class Handler(http.server.SimpleHTTPRequestHandler):
 
         self.send_response(response_code)
         self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(response_body.encode())))
         self.end_headers()
 
         if len(response_body):
@@ -34,5 +61,10 @@ class Handler(http.server.SimpleHTTPRequestHandler):
 if __name__ == '__main__':
     PORT = int(sys.argv[1])
     socketserver.TCPServer.allow_reuse_address = True
-    httpd = socketserver.TCPServer(('0.0.0.0', PORT), Handler)
+    if os.environ.get("WEB_KEEPALIVE"):
+        # Keep the connections open between requests, one thread per connection
+        Handler.protocol_version = "HTTP/1.1"
+        httpd = socketserver.ThreadingTCPServer(('0.0.0.0', PORT), Handler)
+    else:
+        httpd = socketserver.TCPServer(('0.0.0.0', PORT), Handler)
     httpd.serve_forever()
@@ -0,0 +1,37 @@
+import re
+import time
+
+
+def test_events_are_not_buffered(docker_compose, nginxproxy):
+    # Wait for the container to be proxied before timing the stream
+    assert nginxproxy.get("http://events.nginx-proxy.tld/port").status_code == 200
+    start = time.monotonic()
+    r = nginxproxy.get("http://events.nginx-proxy.tld/stream/3", stream=True)
+    assert r.status_code == 200
+    first_event = next(r.iter_lines())
+    elapsed = time.monotonic() - start
+    r.close()
+    assert first_event == b"data: event 0"
+    # The last event is sent after two seconds
+    assert elapsed < 1.5
+
+
+def test_sse_profile(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"(?m)^ +proxy_buffering off;$", conf)
+    assert re.search(r"(?m)^ +proxy_max_temp_file_size 0;$", conf)
+
+
+def test_download_profile(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"(?m)^ +proxy_buffers 64 16k;$", conf)
+    r = nginxproxy.get("http://downloads.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 82\n"
+
+
+def test_unknown_profile_is_reported(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert '# /!\\ WARNING: unknown buffering profile "huge" in the buffering label, using nginx\'s default buffering.' in conf
+    r = nginxproxy.get("http://unknown.nginx-proxy.tld/port")
+    assert r.status_code == 200
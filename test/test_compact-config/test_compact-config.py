@@ -0,0 +1,31 @@
+"""
+Test the compact configuration output (COMPACT_CONFIG=true)
+"""
+import re
+
+
+def test_compact_config_is_routed(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://web1.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 81\n"
+    r = nginxproxy.get("http://web2.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 82\n"
+
+
+def test_diagnostic_comments_are_not_in_config(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode()
+    assert re.search(r"upstream web1\.nginx-proxy\.tld \{\n    server \S+:81;\n", conf)
+    assert "# Container:" not in conf
+    assert "IPv4 address:" not in conf
+    assert "#@report" not in conf
+    assert not re.search(r"^[ \t]*\n", conf, re.MULTILINE)
+
+
+def test_diagnostic_comments_are_in_report(docker_compose, nginxproxy):
+    result = nginxproxy.get_nginx_proxy_container().exec_run("cat /etc/nginx/conf.d/nginx-proxy/report")
+    assert result.exit_code == 0
+    report = result.output.decode()
+    assert "upstream web1.nginx-proxy.tld\n    # Container: " in report
+    assert "#     using port: 81" in report
+    assert "upstream web2.nginx-proxy.tld\n" in report
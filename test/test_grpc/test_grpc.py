@@ -0,0 +1,58 @@
+import re
+
+import backoff
+import grpc
+import pytest
+
+
+def hello_request(greeting: str) -> bytes:
+    # hello.HelloRequest message with its greeting field (1) set
+    encoded = greeting.encode()
+    return b"\x0a" + bytes([len(encoded)]) + encoded
+
+
+def hello_reply(message: bytes) -> str:
+    # hello.HelloResponse message with its reply field (1) set
+    assert message[0] == 0x0a
+    return message[2:2 + message[1]].decode()
+
+
+@pytest.fixture
+def channel(docker_compose, nginxproxy):
+    # Cleartext HTTP/2 to the HTTP port of nginx-proxy, with the virtual host as authority
+    channel = grpc.insecure_channel(
+        f"{nginxproxy.get_ip()}:80",
+        options=[("grpc.default_authority", "grpc.nginx-proxy.tld")],
+    )
+    yield channel
+    channel.close()
+
+
+@backoff.on_exception(backoff.constant, grpc.RpcError, interval=.3, max_tries=30, jitter=None)
+def say_hello(channel, greeting):
+    call = channel.unary_unary("/hello.HelloService/SayHello")
+    return hello_reply(call(hello_request(greeting), timeout=5))
+
+
+def test_unary_call(channel):
+    assert say_hello(channel, "nginx-proxy") == "hello nginx-proxy"
+
+
+def test_server_streaming_call(channel):
+    say_hello(channel, "ready")
+    call = channel.unary_stream("/hello.HelloService/LotsOfReplies")
+    replies = [hello_reply(message) for message in call(hello_request("stream"), timeout=10)]
+    assert len(replies) > 1
+    assert all(reply.startswith("hello stream") for reply in replies)
+
+
+def test_stream_profile(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"(?m)^ +grpc_read_timeout 24h;$", conf)
+    assert re.search(r"(?m)^ +grpc_send_timeout 24h;$", conf)
+    assert re.search(r"(?m)^ +client_body_timeout 24h;$", conf)
+    assert re.search(r"(?m)^ +client_max_body_size 0;$", conf)
+    assert re.search(r"(?m)^ +http2_max_concurrent_streams 256;$", conf)
+    # no label, nginx defaults
+    assert "grpc_buffer_size" not in conf
+    assert "grpc_socket_keepalive" not in conf
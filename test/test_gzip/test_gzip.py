@@ -0,0 +1,31 @@
+import re
+
+
+def test_global_compression(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://compressed.nginx-proxy.tld/port", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.text == "answer from port 81\n"
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+
+
+def test_compression_disabled_by_label(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://uncompressed.nginx-proxy.tld/port", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.text == "answer from port 82\n"
+    assert "Content-Encoding" not in r.headers
+
+
+def test_compression_level_label(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"(?m)^gzip on;$", conf)
+    assert re.search(r"(?m)^gzip_comp_level 5;$", conf)
+    assert re.search(r"(?m)^ +gzip_comp_level 9;$", conf)
+    r = nginxproxy.get("http://high-level.nginx-proxy.tld/port", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["Content-Encoding"] == "gzip"
+
+
+def test_invalid_label_is_reported(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert '# /!\\ WARNING: invalid condition "sometimes" in gzip.proxied label.' in conf
@@ -14,3 +14,24 @@ def test_loadbalance_roundrobin(docker_compose, nginxproxy):
     r2 = nginxproxy.get("http://loadbalance-disabled.nginx-proxy.tld")
     assert r1.status_code == 200
     assert r2.text != r1.text
+
+def test_loadbalance_preset(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"(?m)^upstream loadbalance-preset\.nginx-proxy\.tld \{\n(    #.*\n)?    random two least_conn;$", conf)
+    r = nginxproxy.get("http://loadbalance-preset.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 83\n"
+
+def test_loadbalance_unknown_method_is_ignored(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r'WARNING: Unknown load balancing method "fastest"', conf)
+    assert not re.search(r"(?m)^\s*fastest", conf)
+    r = nginxproxy.get("http://loadbalance-unknown.nginx-proxy.tld/port")
+    assert r.status_code == 200
+
+def test_upstream_zones(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    upstreams = re.findall(r"(?ms)^upstream (\S+) \{\n(.*?)^\}", conf)
+    assert upstreams
+    for upstream, block in upstreams:
+        assert re.search(r"(?m)^    zone \S+ [0-9]+[km];$", block), upstream
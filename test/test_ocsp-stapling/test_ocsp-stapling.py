@@ -0,0 +1,31 @@
+import time
+
+
+def stapled_ocsp_response(container) -> str:
+    """
+    Return the output of an openssl TLS handshake requesting the OCSP status
+    of the ocsp.nginx-proxy.tld certificate.
+    """
+    result = container.exec_run(
+        ["sh", "-c", "openssl s_client -connect 127.0.0.1:443 -servername ocsp.nginx-proxy.tld -status < /dev/null"]
+    )
+    return result.output.decode()
+
+
+def test_ocsp_response_is_prefetched(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert "ssl_stapling_file /etc/nginx/certs/ocsp.nginx-proxy.tld.ocsp.der;" in conf
+    container = nginxproxy.get_nginx_proxy_container()
+    assert container.exec_run("test -s /etc/nginx/certs/ocsp.nginx-proxy.tld.ocsp.der").exit_code == 0
+
+
+def test_ocsp_response_is_stapled_without_the_responder(docker_compose, nginxproxy):
+    docker_compose.containers.get("ocsp-responder").stop()
+    container = nginxproxy.get_nginx_proxy_container()
+    assert container.exec_run("nginx -s reload").exit_code == 0
+    time.sleep(1)
+    # The very first handshake of the new workers staples the prefetched response
+    output = stapled_ocsp_response(container)
+    assert "OCSP Response Status: successful" in output
+    assert "Cert Status: good" in output
+    assert nginxproxy.get("https://ocsp.nginx-proxy.tld/port").text == "answer from port 81\n"
@@ -0,0 +1,51 @@
+import re
+
+
+def test_cached_response_is_served_from_cache(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://cached.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 81\n"
+    assert r.headers["X-Cache-Status"] in ("MISS", "HIT")
+    r = nginxproxy.get("http://cached.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 81\n"
+    assert r.headers["X-Cache-Status"] == "HIT"
+
+
+def test_cache_bypass(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://cached.nginx-proxy.tld/port", headers={"X-No-Cache": "1"})
+    assert r.status_code == 200
+    assert r.headers["X-Cache-Status"] == "BYPASS"
+
+
+def test_cache_directives(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"proxy_cache_path /var/cache/nginx/nginx-proxy/cached\.nginx-proxy\.tld levels=1:2 keys_zone=cache_cached\.nginx-proxy\.tld:1m use_temp_path=off;", conf)
+    assert "proxy_cache_valid 200 10m;" in conf
+    assert "proxy_cache_use_stale error timeout updating;" in conf
+    assert "proxy_cache_background_update on;" in conf
+    assert "proxy_cache_lock on;" in conf
+
+
+def test_not_cached_response(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://not-cached.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 82\n"
+    assert "X-Cache-Status" not in r.headers
+
+
+def test_invalid_cache_settings_are_reported(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert '# /!\\ WARNING: invalid cache zone size "lots" in the cache.zone-size label.' in conf
+    assert "cache_invalid-cache.nginx-proxy.tld" not in conf
+    r = nginxproxy.get("http://invalid-cache.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert "X-Cache-Status" not in r.headers
+
+
+def test_cache_key_with_whitespace_is_rejected(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert '# /!\\ WARNING: invalid value "$scheme $host$request_uri" in the cache.key label, it can\'t contain whitespace.' in conf
+    assert "cache_invalid-cache-key.nginx-proxy.tld" not in conf
+    r = nginxproxy.get("http://invalid-cache-key.nginx-proxy.tld/port")
+    assert r.status_code == 200
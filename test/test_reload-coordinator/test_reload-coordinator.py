@@ -0,0 +1,66 @@
+"""
+Test that the reload coordinator batches the reloads requested by docker-gen
+"""
+import re
+from time import sleep
+
+import pytest
+from docker.errors import NotFound
+
+BURST_SIZE = 6
+
+RELOADED = re.compile(r"Info: reloaded nginx \(master process \d+\), absorbed (\d+) request\(s\)")
+
+
+@pytest.fixture
+def burst(docker_compose):
+    """
+    pytest fixture starting BURST_SIZE web containers in a row.
+    """
+    network = docker_compose.networks.get("test_reload-coordinator-net")
+    containers = []
+    for index in range(BURST_SIZE):
+        container = docker_compose.containers.run(
+            name=f"burst{index}",
+            image="web",
+            detach=True,
+            environment={
+                "WEB_PORTS": "81",
+                "VIRTUAL_HOST": f"burst{index}.nginx-proxy.tld"
+            },
+        )
+        network.connect(container)
+        containers.append(container)
+    sleep(6)  # give docker-gen and the reload coordinator time to settle
+    yield containers
+    for index in range(BURST_SIZE):
+        try:
+            docker_compose.containers.get(f"burst{index}").remove(force=True)
+        except NotFound:
+            pass
+
+
+def absorbed_requests(nginxproxy) -> list:
+    logs = nginxproxy.get_nginx_proxy_container().logs().decode()
+    return [int(count) for count in RELOADED.findall(logs)]
+
+
+def test_burst_is_batched(docker_compose, nginxproxy, burst):
+    for index in range(BURST_SIZE):
+        r = nginxproxy.get(f"http://burst{index}.nginx-proxy.tld/port")
+        assert r.status_code == 200
+        assert r.text == "answer from port 81\n"
+
+    absorbed = absorbed_requests(nginxproxy)
+    assert absorbed, "the reload coordinator did not log any reload"
+    # docker-gen requested a reload for each container it detected (at least),
+    # the coordinator must have applied several of them at once.
+    assert max(absorbed) > 1
+    assert len(absorbed) < sum(absorbed)
+
+
+def test_reload_coordinator_is_running(docker_compose, nginxproxy):
+    container = nginxproxy.get_nginx_proxy_container()
+    result = container.exec_run("cat /var/run/nginx-proxy/reload-coordinator.pid")
+    assert result.exit_code == 0
+    assert container.exec_run("test -p /var/run/nginx-proxy/reload.fifo").exit_code == 0
@@ -0,0 +1,79 @@
+"""
+Test the draining policy of the old nginx worker processes
+"""
+import json
+import socket
+import time
+
+import backoff
+import pytest
+
+RELOAD_FIFO = "/var/run/nginx-proxy/reload.fifo"
+
+
+def reload_status(nginxproxy) -> dict:
+    result = nginxproxy.get_nginx_proxy_container().exec_run("cat /var/run/nginx-proxy/reload-status.json")
+    assert result.exit_code == 0
+    return json.loads(result.output)
+
+
+def request_reload(nginxproxy):
+    result = nginxproxy.get_nginx_proxy_container().exec_run(["sh", "-c", f"echo 'request -' > {RELOAD_FIFO}"])
+    assert result.exit_code == 0
+
+
+@backoff.on_predicate(backoff.constant, lambda r: r is False, interval=.2, max_tries=100, jitter=None)
+def wait_for_status(nginxproxy, predicate) -> bool:
+    return predicate(reload_status(nginxproxy))
+
+
+@pytest.fixture
+def long_lived_connection(docker_compose, nginxproxy):
+    """
+    A connection to nginx sending a request body that never completes, which
+    keeps the worker process handling it busy until worker_shutdown_timeout.
+    """
+    assert wait_for_status(nginxproxy, lambda status: status["draining_generations"] == 0)
+    connection = socket.create_connection((nginxproxy.get_ip(), 80), timeout=30)
+    connection.sendall(
+        b"POST /port HTTP/1.1\r\n"
+        b"Host: web.nginx-proxy.tld\r\n"
+        b"Content-Length: 1000\r\n"
+        b"\r\n"
+        b"partial body"
+    )
+    yield connection
+    connection.close()
+
+
+def test_web_is_reachable(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://web.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 81\n"
+
+
+def test_worker_shutdown_timeout_is_set(docker_compose, nginxproxy):
+    container = nginxproxy.get_nginx_proxy_container()
+    result = container.exec_run("nginx -T")
+    assert result.exit_code == 0
+    assert "worker_shutdown_timeout 5s;" in result.output.decode()
+
+
+def test_reload_is_deferred_while_old_workers_drain(docker_compose, nginxproxy, long_lived_connection):
+    reloads = reload_status(nginxproxy)["reloads"]
+
+    # The worker process holding the connection keeps draining after this reload
+    request_reload(nginxproxy)
+    assert wait_for_status(nginxproxy, lambda status: status["reloads"] == reloads + 1 and status["draining_generations"] == 1)
+
+    # RELOAD_MAX_DRAINING_GENERATIONS is reached, the next reload waits
+    request_reload(nginxproxy)
+    time.sleep(2)
+    assert reload_status(nginxproxy)["reloads"] == reloads + 1
+    logs = nginxproxy.get_nginx_proxy_container().logs().decode()
+    assert "Info: deferring the nginx reload, 1 generation(s) of old worker processes are still draining" in logs
+
+    # worker_shutdown_timeout (5s) ends the connection, the deferred reload goes ahead
+    assert wait_for_status(nginxproxy, lambda status: status["reloads"] == reloads + 2)
+    logs = nginxproxy.get_nginx_proxy_container().logs().decode()
+    assert f'{{"event":"drained","reload":{reloads + 1},' in logs
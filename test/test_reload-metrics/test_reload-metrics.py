@@ -0,0 +1,44 @@
+"""
+Test that the reload coordinator logs the cost of every reload and keeps the
+measures of the last one in its status file
+"""
+import json
+import re
+
+RELOAD_EVENT = re.compile(r'^\{"event":"reload",.*\}$', re.MULTILINE)
+
+RELOAD_FIELDS = {"id", "time", "requests", "render_ms", "config_bytes", "parse_ms", "workers_ready_ms", "old_workers"}
+
+
+def reload_events(nginxproxy) -> list:
+    logs = nginxproxy.get_nginx_proxy_container().logs().decode()
+    return [json.loads(line) for line in RELOAD_EVENT.findall(logs)]
+
+
+def test_web_is_reachable(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://web.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 81\n"
+
+
+def test_reloads_are_logged_as_json(docker_compose, nginxproxy):
+    events = reload_events(nginxproxy)
+    assert events, "the reload coordinator did not log any reload"
+    event = events[-1]
+    assert RELOAD_FIELDS <= set(event)
+    assert event["requests"] >= 1
+    assert event["config_bytes"] > 0
+    assert event["parse_ms"] is not None
+    # the last reload was requested by docker-gen
+    assert event["render_ms"] is not None
+
+
+def test_status_file(docker_compose, nginxproxy):
+    container = nginxproxy.get_nginx_proxy_container()
+    result = container.exec_run("cat /var/run/nginx-proxy/reload-status.json")
+    assert result.exit_code == 0
+    status = json.loads(result.output)
+    assert status["reloads"] >= 1
+    assert status["draining_generations"] >= 0
+    assert RELOAD_FIELDS <= set(status["last_reload"])
+    assert status["last_reload"]["id"] == status["reloads"]
@@ -0,0 +1,68 @@
+import pathlib
+import re
+from typing import List
+
+import backoff
+import pytest
+import requests
+
+# 10,000 server names, spread over ten containers to keep each VIRTUAL_HOST
+# value well under the size limit of an environment variable.
+SERVICES = 10
+HOSTS_PER_SERVICE = 1000
+
+
+def hostname(service: int, host: int) -> str:
+    return f"h{service:02d}{host:04d}.nginx-proxy.tld"
+
+
+@pytest.fixture(scope="module")
+def fleet_compose_file(tmp_path_factory) -> pathlib.Path:
+    lines = ["services:"]
+    for service in range(SERVICES):
+        hosts = ",".join(hostname(service, host) for host in range(HOSTS_PER_SERVICE))
+        lines += [
+            f"  web{service}:",
+            "    image: web",
+            "    expose:",
+            f"      - \"{81 + service}\"",
+            "    environment:",
+            f"      WEB_PORTS: \"{81 + service}\"",
+            f"      VIRTUAL_HOST: \"{hosts}\"",
+        ]
+    compose_file = tmp_path_factory.mktemp("server-names-hash").joinpath("fleet.yml")
+    compose_file.write_text("\n".join(lines) + "\n")
+    return compose_file
+
+
+@pytest.fixture
+def docker_compose_files(fleet_compose_file) -> List[str]:
+    return [
+        pathlib.Path(__file__).parent.parent.joinpath("compose.base.yml").as_posix(),
+        fleet_compose_file.as_posix(),
+    ]
+
+
+@backoff.on_predicate(backoff.constant, lambda r: r.status_code == 503, interval=1, max_tries=60, jitter=None)
+def get(nginxproxy, url):
+    return nginxproxy.get(url)
+
+
+def test_server_names_hash_is_sized_after_the_server_names(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode("ASCII")
+    assert re.search(r"(?m)^server_names_hash_bucket_size 256;$", conf)
+    assert re.search(r"(?m)^server_names_hash_max_size 16384;$", conf)
+
+
+def test_server_names_hash_is_built_without_warning(docker_compose, nginxproxy):
+    result = nginxproxy.get_nginx_proxy_container().exec_run("nginx -t")
+    output = result.output.decode()
+    assert result.exit_code == 0, output
+    assert "could not build" not in output
+
+
+@pytest.mark.parametrize("service,host", [(0, 0), (4, 517), (9, 999)])
+def test_every_server_name_is_forwarded(docker_compose, nginxproxy, service, host):
+    r = get(nginxproxy, f"http://{hostname(service, host)}/port")
+    assert r.status_code == 200
+    assert r.text == f"answer from port {81 + service}\n"
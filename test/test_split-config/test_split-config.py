@@ -0,0 +1,98 @@
+"""
+Test the split configuration output (SPLIT_CONFIG=true)
+"""
+from time import sleep
+
+import pytest
+from docker.errors import NotFound
+
+SPLIT_DIR = "/etc/nginx/conf.d/nginx-proxy"
+
+
+def read_file(nginxproxy, path: str) -> str:
+    result = nginxproxy.get_nginx_proxy_container().exec_run(f"cat {path}")
+    assert result.exit_code == 0, result.output
+    return result.output.decode()
+
+
+def mtime(nginxproxy, path: str) -> str:
+    result = nginxproxy.get_nginx_proxy_container().exec_run(f"stat -c %Y.%Z {path}")
+    assert result.exit_code == 0, result.output
+    return result.output.decode().strip()
+
+
+@pytest.fixture
+def web3(docker_compose):
+    """
+    pytest fixture creating a web container with `VIRTUAL_HOST=web3.nginx-proxy.tld` listening on port 83.
+    """
+    container = docker_compose.containers.run(
+        name="web3",
+        image="web",
+        detach=True,
+        environment={
+            "WEB_PORTS": "83",
+            "VIRTUAL_HOST": "web3.nginx-proxy.tld"
+        },
+        ports={"83/tcp": None}
+    )
+    docker_compose.networks.get("test_split-config-net").connect(container)
+    sleep(2)  # give it some time to initialize and for docker-gen to detect it
+    yield container
+    try:
+        docker_compose.containers.get("web3").remove(force=True)
+    except NotFound:
+        pass
+
+
+def test_split_config_is_routed(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://web1.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 81\n"
+    r = nginxproxy.get("http://web2.nginx-proxy.tld/web2/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 82\n"
+
+
+def test_default_conf_includes_split_files(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode()
+    assert f"include {SPLIT_DIR}/http.conf;" in conf
+    assert f"include {SPLIT_DIR}/fallback.conf;" in conf
+    assert f"include {SPLIT_DIR}/upstreams/web1.nginx-proxy.tld.conf;" in conf
+    assert f"include {SPLIT_DIR}/vhosts/web1.nginx-proxy.tld.conf;" in conf
+    assert f"include {SPLIT_DIR}/vhosts/web2.nginx-proxy.tld.conf;" in conf
+    assert "server_name web1.nginx-proxy.tld;" not in conf
+
+
+def test_split_files_content(docker_compose, nginxproxy):
+    assert "upstream web1.nginx-proxy.tld {" in read_file(nginxproxy, f"{SPLIT_DIR}/upstreams/web1.nginx-proxy.tld.conf")
+    vhost = read_file(nginxproxy, f"{SPLIT_DIR}/vhosts/web1.nginx-proxy.tld.conf")
+    assert "server_name web1.nginx-proxy.tld;" in vhost
+    assert "#@file" not in vhost
+
+
+def test_only_changed_files_are_rewritten(docker_compose, nginxproxy, web3):
+    web1_vhost = f"{SPLIT_DIR}/vhosts/web1.nginx-proxy.tld.conf"
+    web1_mtime = mtime(nginxproxy, web1_vhost)
+
+    r = nginxproxy.get("http://web3.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 83\n"
+    manifest = read_file(nginxproxy, f"{SPLIT_DIR}/manifest").splitlines()
+    assert "added vhosts/web3.nginx-proxy.tld.conf" in manifest
+    assert "added upstreams/web3.nginx-proxy.tld.conf" in manifest
+    assert "unchanged vhosts/web1.nginx-proxy.tld.conf" in manifest
+    assert "changed default.conf" in manifest
+
+    web3.remove(force=True)
+    sleep(2)
+    r = nginxproxy.get("http://web3.nginx-proxy.tld/port")
+    assert r.status_code == 503
+    manifest = read_file(nginxproxy, f"{SPLIT_DIR}/manifest").splitlines()
+    assert "removed vhosts/web3.nginx-proxy.tld.conf" in manifest
+    assert mtime(nginxproxy, web1_vhost) == web1_mtime
+
+
+def test_generated_config_does_not_change_on_every_render(docker_compose, nginxproxy):
+    # docker-gen only notifies (and nginx only reloads) when its output changed
+    assert "#@render" not in read_file(nginxproxy, f"{SPLIT_DIR}/generated")
@@ -8,6 +8,10 @@ import pytest
     ("https://www.nginx-proxy.tld", True, "nginx-proxy.tld"),
     ("http://subdomain.www.nginx-proxy.tld", False, ""),
     ("https://web1.nginx-proxy.tld", True, "web1.nginx-proxy.tld"),
+    # CERT_NAME in a subdirectory of /etc/nginx/certs
+    ("https://web2.nginx-proxy.tld", True, "shared/web2.nginx-proxy.tld"),
+    # dangling certificate and key symlinks
+    ("http://web3.nginx-proxy.tld", False, ""),
 ])
 def test_certificate_selection(
     docker_compose,
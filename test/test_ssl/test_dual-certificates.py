@@ -0,0 +1,40 @@
+import pathlib
+import socket
+import ssl
+
+import pytest
+
+CERTS_DIR = pathlib.Path(__file__).parent / "certs_ecdsa"
+
+
+def served_certificate(ip: str, ciphers: str) -> bytes:
+    """
+    Return the DER certificate served over TLS 1.2 with the given cipher suites.
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    context.maximum_version = ssl.TLSVersion.TLSv1_2
+    context.set_ciphers(ciphers)
+    with socket.create_connection((ip, 443)) as sock:
+        with context.wrap_socket(sock, server_hostname="web.nginx-proxy.tld") as tls:
+            return tls.getpeercert(binary_form=True)
+
+
+def test_both_certificates_are_configured(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert "ssl_certificate /etc/nginx/certs/web.nginx-proxy.tld.crt;" in conf
+    assert "ssl_certificate_key /etc/nginx/certs/web.nginx-proxy.tld.key;" in conf
+    assert "ssl_certificate /etc/nginx/certs/web.nginx-proxy.tld.ecdsa.crt;" in conf
+    assert "ssl_certificate_key /etc/nginx/certs/web.nginx-proxy.tld.ecdsa.key;" in conf
+
+
+@pytest.mark.parametrize("ciphers,expected_cert", [
+    ("ECDHE-ECDSA-AES128-GCM-SHA256", "web.nginx-proxy.tld.ecdsa.crt"),
+    ("ECDHE-RSA-AES128-GCM-SHA256", "web.nginx-proxy.tld.crt"),
+])
+def test_certificate_matches_client_support(docker_compose, nginxproxy, ciphers, expected_cert):
+    r = nginxproxy.get("https://web.nginx-proxy.tld/port")
+    assert r.text == "answer from port 81\n"
+    expected = ssl.PEM_cert_to_DER_cert((CERTS_DIR / expected_cert).read_text())
+    assert served_certificate(nginxproxy.get_ip(), ciphers) == expected
@@ -0,0 +1,48 @@
+import re
+import socket
+import ssl
+
+import pytest
+
+
+def https_request(ip: str, context: ssl.SSLContext, session=None):
+    """
+    Send a request over a new TLS connection, return the TLS session and
+    whether it was resumed.
+    """
+    with socket.create_connection((ip, 443)) as sock:
+        with context.wrap_socket(sock, server_hostname="web1.nginx-proxy.tld", session=session) as tls:
+            tls.sendall(b"GET /port HTTP/1.1\r\nHost: web1.nginx-proxy.tld\r\nConnection: close\r\n\r\n")
+            response = b""
+            while chunk := tls.recv(4096):
+                response += chunk
+            assert b"answer from port 81\n" in response
+            return tls.session, tls.session_reused
+
+
+@pytest.fixture
+def tls12_context():
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    context.maximum_version = ssl.TLSVersion.TLSv1_2
+    # Only resume sessions from the session cache of nginx
+    context.options |= ssl.OP_NO_TICKET
+    return context
+
+
+def test_session_cache_is_declared_once(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.findall(r"(?m)^\s*ssl_session_cache .*$", conf) == ["ssl_session_cache shared:SSL:10m;"]
+    assert re.findall(r"(?m)^\s*ssl_session_timeout .*$", conf) == ["ssl_session_timeout 1h;"]
+
+
+def test_session_is_resumed_from_cache(docker_compose, nginxproxy, tls12_context):
+    # Wait for the virtual host to be proxied
+    assert nginxproxy.get("https://web1.nginx-proxy.tld/port").status_code == 200
+    ip = nginxproxy.get_ip()
+    session, reused = https_request(ip, tls12_context)
+    assert not reused
+    assert not session.has_ticket
+    _, reused = https_request(ip, tls12_context, session=session)
+    assert reused
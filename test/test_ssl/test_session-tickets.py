@@ -0,0 +1,49 @@
+import re
+import socket
+import ssl
+
+import pytest
+
+
+def https_request(ip: str, context: ssl.SSLContext, session=None):
+    """
+    Send a request over a new TLS connection, return the TLS session and
+    whether it was resumed.
+    """
+    with socket.create_connection((ip, 443)) as sock:
+        with context.wrap_socket(sock, server_hostname="web1.nginx-proxy.tld", session=session) as tls:
+            tls.sendall(b"GET /port HTTP/1.1\r\nHost: web1.nginx-proxy.tld\r\nConnection: close\r\n\r\n")
+            response = b""
+            while chunk := tls.recv(4096):
+                response += chunk
+            assert b"answer from port 81\n" in response
+            return tls.session, tls.session_reused
+
+
+@pytest.fixture
+def tls_context():
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def test_session_ticket_keys_are_configured(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert "include /etc/nginx/session-tickets.conf;" in conf
+    assert not re.search(r"(?m)^ +ssl_session_tickets off;$", conf)
+    container = nginxproxy.get_nginx_proxy_container()
+    tickets_conf = container.exec_run("cat /etc/nginx/session-tickets.conf").output.decode()
+    assert "ssl_session_tickets on;" in tickets_conf
+    assert re.search(r"(?m)^ssl_session_ticket_key /etc/nginx/session-tickets/[0-9]+\.key;$", tickets_conf)
+
+
+def test_session_is_resumed_with_ticket(docker_compose, nginxproxy, tls_context):
+    # Wait for the virtual host to be proxied
+    assert nginxproxy.get("https://web1.nginx-proxy.tld/port").status_code == 200
+    ip = nginxproxy.get_ip()
+    session, reused = https_request(ip, tls_context)
+    assert not reused
+    assert session.has_ticket
+    _, reused = https_request(ip, tls_context, session=session)
+    assert reused
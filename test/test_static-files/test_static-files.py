@@ -0,0 +1,22 @@
+def test_static_file_from_path_prefix(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://web.nginx-proxy.tld/assets/hello.txt")
+    assert r.status_code == 200
+    assert r.text == "static asset\n"
+
+
+def test_static_file_from_extension(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://web.nginx-proxy.tld/style.css")
+    assert r.status_code == 200
+    assert r.text == "body { color: black; }\n"
+
+
+def test_missing_static_file_falls_back_to_upstream(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://web.nginx-proxy.tld/assets/missing.txt")
+    assert r.status_code == 404
+    assert r.text == "No route for this path!\n"
+
+
+def test_other_paths_are_proxied(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://web.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 81\n"
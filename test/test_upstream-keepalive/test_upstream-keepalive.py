@@ -0,0 +1,40 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+REQUESTS = 200
+
+
+def backend_connections(nginxproxy, host):
+    r = nginxproxy.get(f"http://{host}/connections")
+    assert r.status_code == 200
+    return int(r.text.split()[0])
+
+
+def load(nginxproxy, host):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda _: nginxproxy.get(f"http://{host}/port"), range(REQUESTS)))
+    assert all(r.status_code == 200 for r in responses)
+
+
+def test_keepalive_directives(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"(?m)^ +keepalive_requests 10000;$", conf)
+    assert re.search(r"(?m)^ +keepalive_time 1h;$", conf)
+    assert re.search(r"(?m)^ +keepalive_timeout 120s;$", conf)
+    pools = [int(size) for size in re.findall(r"(?m)^ +keepalive ([0-9]+);$", conf)]
+    assert pools and all(size >= 2 for size in pools)
+
+
+def test_connections_are_reused_under_load(docker_compose, nginxproxy):
+    before = backend_connections(nginxproxy, "pooled.nginx-proxy.tld")
+    load(nginxproxy, "pooled.nginx-proxy.tld")
+    opened = backend_connections(nginxproxy, "pooled.nginx-proxy.tld") - before
+    # At most one connection per concurrent request and nginx worker process
+    assert opened < REQUESTS / 4
+
+
+def test_connections_are_not_reused_without_keepalive(docker_compose, nginxproxy):
+    before = backend_connections(nginxproxy, "unpooled.nginx-proxy.tld")
+    load(nginxproxy, "unpooled.nginx-proxy.tld")
+    opened = backend_connections(nginxproxy, "unpooled.nginx-proxy.tld") - before
+    assert opened >= REQUESTS
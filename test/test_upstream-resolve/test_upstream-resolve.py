@@ -0,0 +1,104 @@
+"""
+Test the DNS resolved upstream servers (UPSTREAM_RESOLVE=true)
+"""
+import re
+from time import sleep
+
+import pytest
+from docker.errors import NotFound
+
+
+def upstream_block(conf: str, name: str) -> str:
+    match = re.search(r"(?ms)^upstream " + re.escape(name) + r" \{\n(.*?)^\}", conf)
+    assert match, f"upstream {name} not found"
+    return match.group(1)
+
+
+@pytest.fixture
+def static(docker_compose):
+    """
+    pytest fixture creating a web container outside of any compose project,
+    which must be proxied with its IP address.
+    """
+    container = docker_compose.containers.run(
+        name="static",
+        image="web",
+        detach=True,
+        environment={
+            "WEB_PORTS": "82",
+            "VIRTUAL_HOST": "static.nginx-proxy.tld"
+        },
+        ports={"82/tcp": None}
+    )
+    docker_compose.networks.get("test_upstream-resolve-net").connect(container)
+    sleep(2)  # give it some time to initialize and for docker-gen to detect it
+    yield container
+    try:
+        docker_compose.containers.get("static").remove(force=True)
+    except NotFound:
+        pass
+
+
+@pytest.fixture
+def extra_replica(docker_compose):
+    """
+    pytest fixture adding a replica to the "resolved" compose service, the way
+    `docker compose up --scale` does.
+    """
+    replica = docker_compose.containers.list(filters={"label": "com.docker.compose.service=resolved"})[0]
+    container = docker_compose.containers.run(
+        name="resolved-extra",
+        image="web",
+        detach=True,
+        environment={
+            "WEB_PORTS": "81",
+            "VIRTUAL_HOST": "resolved.nginx-proxy.tld"
+        },
+        labels={
+            "com.docker.compose.project": replica.labels["com.docker.compose.project"],
+            "com.docker.compose.service": "resolved",
+        },
+    )
+    docker_compose.networks.get("test_upstream-resolve-net").connect(container, aliases=["resolved"])
+    sleep(2)  # give it some time to initialize and for docker-gen to detect it
+    yield container
+    try:
+        docker_compose.containers.get("resolved-extra").remove(force=True)
+    except NotFound:
+        pass
+
+
+def test_replicas_are_resolved_by_nginx(docker_compose, nginxproxy):
+    upstream = upstream_block(nginxproxy.get_conf().decode(), "resolved.nginx-proxy.tld")
+    assert "    zone resolved.nginx-proxy.tld 256k;\n" in upstream
+    assert re.search(r"(?m)^    resolver \S.* valid=10s;$", upstream)
+    assert re.findall(r"(?m)^    server .*;$", upstream) == ["    server resolved:81 resolve;"]
+    assert "# Container:" not in upstream
+
+
+def test_resolved_upstream_is_routed(docker_compose, nginxproxy):
+    for _ in range(4):
+        r = nginxproxy.get("http://resolved.nginx-proxy.tld/port")
+        assert r.status_code == 200
+        assert r.text == "answer from port 81\n"
+
+
+def test_scaling_does_not_change_config(docker_compose, nginxproxy, extra_replica):
+    conf = nginxproxy.get_conf().decode()
+    assert re.findall(r"(?m)^    server .*;$", upstream_block(conf, "resolved.nginx-proxy.tld")) == ["    server resolved:81 resolve;"]
+    assert extra_replica.name not in conf
+
+    extra_replica.remove(force=True)
+    sleep(2)
+    assert nginxproxy.get_conf().decode() == conf
+    r = nginxproxy.get("http://resolved.nginx-proxy.tld/port")
+    assert r.status_code == 200
+
+
+def test_container_outside_compose_uses_ip(docker_compose, nginxproxy, static):
+    upstream = upstream_block(nginxproxy.get_conf().decode(), "static.nginx-proxy.tld")
+    assert re.search(r"(?m)^    server \d+\.\d+\.\d+\.\d+:82;$", upstream)
+    assert "resolve;" not in upstream
+    r = nginxproxy.get("http://static.nginx-proxy.tld/port")
+    assert r.status_code == 200
+    assert r.text == "answer from port 82\n"
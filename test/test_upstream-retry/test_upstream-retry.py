@@ -0,0 +1,33 @@
+import re
+
+
+def test_retry_directives(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"(?m)^ +proxy_connect_timeout 1s;$", conf)
+    assert re.search(r"(?m)^ +proxy_read_timeout 5s;$", conf)
+    assert re.search(r"(?m)^ +proxy_next_upstream error timeout http_502;$", conf)
+    assert re.search(r"(?m)^ +proxy_next_upstream_tries 2;$", conf)
+    assert re.search(r"(?m)^ +proxy_next_upstream_timeout 3s;$", conf)
+    assert re.search(r"(?m)^ +proxy_socket_keepalive on;$", conf)
+    assert len(re.findall(r"(?m)^ +server [0-9.]+:81 max_fails=1 fail_timeout=30s;$", conf)) == 2
+
+
+def test_dead_replica_is_skipped(docker_compose, nginxproxy):
+    for _ in range(4):
+        r = nginxproxy.get("http://retry.nginx-proxy.tld/port")
+        assert r.status_code == 200
+        assert r.text == "answer from port 81\n"
+
+
+def test_invalid_labels_are_reported(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert '# /!\\ WARNING: invalid duration "forever" in the timeout.read label.' in conf
+    assert '# /!\\ WARNING: invalid number "many" in the max-fails label.' in conf
+    r = nginxproxy.get("http://invalid.nginx-proxy.tld/port")
+    assert r.status_code == 200
+
+
+def test_uwsgi_conditions_unknown_to_nginx_are_rejected(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert '# /!\\ WARNING: invalid condition "http_502" in the next-upstream label.' in conf
+    assert "uwsgi_next_upstream" not in conf
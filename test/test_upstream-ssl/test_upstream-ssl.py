@@ -0,0 +1,22 @@
+def test_sni_is_sent(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://sni.nginx-proxy.tld/")
+    assert r.status_code == 200
+    assert "sni=sni.nginx-proxy.tld " in r.text
+
+
+def test_tls_session_is_reused(docker_compose, nginxproxy):
+    responses = [nginxproxy.get("http://sni.nginx-proxy.tld/").text for _ in range(3)]
+    assert any("reused=r " in text for text in responses[1:])
+
+
+def test_upstream_ssl_labels(docker_compose, nginxproxy):
+    r = nginxproxy.get("http://no-sni.nginx-proxy.tld/")
+    assert r.status_code == 200
+    assert "sni= " in r.text
+    assert "protocol=TLSv1.2" in r.text
+
+
+def test_upstream_ssl_directives_only_from_labels(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode()
+    assert conf.count("proxy_ssl_server_name on;") == 1
+    assert "proxy_ssl_session_reuse" not in conf
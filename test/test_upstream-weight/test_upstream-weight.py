@@ -0,0 +1,21 @@
+import re
+
+
+def test_weights_from_cpus(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode('ASCII')
+    assert re.search(r"(?m)^ +server [0-9.]+:81 weight=5 max_conns=10;$", conf)
+    assert re.search(r"(?m)^ +server [0-9.]+:82 weight=40;$", conf)
+
+
+def test_requests_follow_weights(docker_compose, nginxproxy):
+    ports = [nginxproxy.get("http://weighted.nginx-proxy.tld/port").text for _ in range(45)]
+    # Smooth weighted round-robin sends 40 out of every 45 requests to the large container
+    assert ports.count("answer from port 82\n") >= 35
+    assert 1 <= ports.count("answer from port 81\n") <= 10
+
+
+def test_backup_server_is_not_used(docker_compose, nginxproxy):
+    for _ in range(4):
+        r = nginxproxy.get("http://backup.nginx-proxy.tld/port")
+        assert r.status_code == 200
+        assert r.text == "answer from port 83\n"
@@ -0,0 +1,27 @@
+import re
+
+import pytest
+
+
+@pytest.mark.parametrize("host,expected_port", [
+    ("www.order.nginx-proxy.regexp", 81),
+    ("api-123.order.nginx-proxy.regexp", 81),
+    ("api-foo.order.nginx-proxy.regexp", 82),
+    ("api-bar.order.nginx-proxy.regexp", 82),
+])
+def test_most_specific_regexp_host_wins(docker_compose, nginxproxy, host, expected_port):
+    r = nginxproxy.get(f"http://{host}/port")
+    assert r.status_code == 200
+    assert r.text == f"answer from port {expected_port}\n"
+
+
+def test_most_specific_regexp_host_comes_first(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode("ASCII")
+    server_names = re.findall(r"(?m)^\s*server_name (~.*);$", conf)
+    assert server_names.index(r"~^api-[a-z]+\.order\.nginx-proxy\.regexp$") < server_names.index(r"~^.+\.order\.nginx-proxy\.regexp$")
+
+
+def test_pcre_jit_is_enabled(docker_compose, nginxproxy):
+    result = nginxproxy.get_nginx_proxy_container().exec_run("nginx -T")
+    assert result.exit_code == 0
+    assert re.search(r"(?m)^pcre_jit on;$", result.output.decode())
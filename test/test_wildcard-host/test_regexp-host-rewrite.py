@@ -0,0 +1,47 @@
+import hashlib
+import re
+
+import pytest
+
+
+@pytest.mark.parametrize("host,expected_port", [
+    ("www.rewrite.nginx-proxy.regexp", 81),
+    ("a.b.rewrite.nginx-proxy.regexp", 81),
+    ("www.sub.rewrite.nginx-proxy.regexp", 82),
+    ("a.b.sub.rewrite.nginx-proxy.regexp", 82),
+    ("www.kept.nginx-proxy.regexp", 83),
+    ("api-123.kept.nginx-proxy.regexp", 83),
+    ("api-foo.kept.nginx-proxy.regexp", 84),
+])
+def test_routing_is_unchanged(docker_compose, nginxproxy, host, expected_port):
+    r = nginxproxy.get(f"http://{host}/port")
+    assert r.status_code == 200
+    assert r.text == f"answer from port {expected_port}\n"
+
+
+@pytest.mark.parametrize("host", [
+    "rewrite.nginx-proxy.regexp",
+    "sub.rewrite.nginx-proxy.regexp",
+])
+def test_parent_domain_is_not_matched(docker_compose, nginxproxy, host):
+    r = nginxproxy.get(f"http://{host}/port")
+    assert r.status_code == 503
+
+
+def test_leading_wildcard_regexps_are_hashed(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode("ASCII")
+    server_names = re.findall(r"(?m)^\s*server_name (.*);$", conf)
+    assert "*.rewrite.nginx-proxy.regexp" in server_names
+    assert "*.sub.rewrite.nginx-proxy.regexp" in server_names
+    # Only the regexps whose rewrite would change the routing are still evaluated one by one
+    assert [name for name in server_names if name.startswith("~")] == [
+        r"~^api-[a-z]+\.kept\.nginx-proxy\.regexp$",
+        r"~^.*\.kept\.nginx-proxy\.regexp$",
+    ]
+
+
+def test_regexp_still_names_the_upstream(docker_compose, nginxproxy):
+    conf = nginxproxy.get_conf().decode("ASCII")
+    # The upstream of a regexp virtual host is named after the SHA-1 of the regexp
+    upstream_name = hashlib.sha1(r"~^.*\.rewrite\.nginx-proxy\.regexp$".encode()).hexdigest()
+    assert f"upstream {upstream_name} {{" in conf